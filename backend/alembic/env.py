@@ -0,0 +1,65 @@
+import re
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+
+from app.core.config import settings
+from app.db.session import Base
+import app.models  # noqa: F401 - registers the models on Base.metadata
+
+config = context.config
+config.set_main_option("sqlalchemy.url", settings.DATABASE_URL.replace("%", "%%"))
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+# Tables autogenerate must not touch: telemetry partitions (app.db.partitions)
+# and the PostGIS catalog
+_UNMANAGED_TABLES = re.compile(r"^((drone_telemetry|telemetry_rollups)_(p\d{8}|default)|spatial_ref_sys)$")
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Leave tables and indexes outside the models to their owners."""
+    table = object if type_ == "table" else getattr(object, "table", None)
+    if table is not None and _UNMANAGED_TABLES.match(table.name):
+        return False
+    return True
+
+
+def run_migrations_offline():
+    """Emit the migrations as SQL without connecting."""
+    context.configure(
+        url=config.get_main_option("sqlalchemy.url"),
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    """Run the migrations on the database."""
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,117 @@
+"""Initial schema
+
+The tables as the API used to create them with ``create_all`` at startup.
+Databases created that way are adopted as they are.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from geoalchemy2 import Geometry
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+FLIGHT_STATUSES = ("PENDING", "APPROVED", "REJECTED", "IN_PROGRESS", "COMPLETED", "CANCELLED")
+VIOLATION_TYPES = ("NO_FLY_ZONE", "OUT_OF_PATH", "ALTITUDE_VIOLATION", "UNAUTHORIZED_FLIGHT", "OTHER")
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table("users"):
+        # Created by create_all before migrations existed
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS postgis")
+
+    op.create_table(
+        "users",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("full_name", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("password_hash", sa.String(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("is_admin", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "drones",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("model", sa.String(), nullable=False),
+        sa.Column("serial_number", sa.String(), nullable=False, unique=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+    op.create_table(
+        "no_fly_zones",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("area", Geometry("POLYGON", srid=4326, spatial_index=False), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("idx_no_fly_zones_area", "no_fly_zones", ["area"], postgresql_using="gist")
+
+    op.create_table(
+        "flight_requests",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("drone_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("drones.id"), nullable=False),
+        sa.Column("start_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("end_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("altitude", sa.Float(), nullable=False),
+        sa.Column("path", Geometry("LINESTRING", srid=4326, spatial_index=False), nullable=False),
+        sa.Column("status", sa.Enum(*FLIGHT_STATUSES, name="flightstatus"), nullable=False),
+        sa.Column("rejection_reason", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("idx_flight_requests_path", "flight_requests", ["path"], postgresql_using="gist")
+
+    op.create_table(
+        "drone_telemetry",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("drone_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("drones.id"), nullable=False),
+        sa.Column("location", Geometry("POINT", srid=4326, spatial_index=False), nullable=False),
+        sa.Column("altitude", sa.Float(), nullable=False),
+        sa.Column("speed", sa.Float(), nullable=True),
+        sa.Column("heading", sa.Float(), nullable=True),
+        sa.Column("battery_level", sa.Float(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("timestamp", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    op.create_index("idx_drone_telemetry_location", "drone_telemetry", ["location"], postgresql_using="gist")
+
+    op.create_table(
+        "violations",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("drone_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("drones.id"), nullable=False),
+        sa.Column(
+            "flight_request_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("flight_requests.id"), nullable=True
+        ),
+        sa.Column("type", sa.Enum(*VIOLATION_TYPES, name="violationtype"), nullable=False),
+        sa.Column("location", Geometry("POINT", srid=4326, spatial_index=False), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    op.create_index("idx_violations_location", "violations", ["location"], postgresql_using="gist")
+
+
+def downgrade():
+    op.drop_table("violations")
+    op.drop_table("drone_telemetry")
+    op.drop_table("flight_requests")
+    op.drop_table("no_fly_zones")
+    op.drop_table("drones")
+    op.drop_table("users")
+    sa.Enum(name="violationtype").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="flightstatus").drop(op.get_bind(), checkfirst=True)
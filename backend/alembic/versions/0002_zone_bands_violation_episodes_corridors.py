@@ -0,0 +1,59 @@
+"""Zone altitude bands, violation episodes and flight corridors
+
+Columns added to the models while the schema was still created with
+``create_all``, which does not alter existing tables. ``IF NOT EXISTS``
+keeps databases created from the newer models working. Violations from
+before episodes existed were single points, they are closed at the moment
+they were recorded rather than resumed as open episodes.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    had_episodes = "ended_at" in {column["name"] for column in sa.inspect(op.get_bind()).get_columns("violations")}
+
+    op.execute("""
+        ALTER TABLE no_fly_zones
+            ADD COLUMN IF NOT EXISTS min_altitude double precision,
+            ADD COLUMN IF NOT EXISTS max_altitude double precision,
+            ADD COLUMN IF NOT EXISTS active boolean NOT NULL DEFAULT true
+    """)
+    op.execute("""
+        ALTER TABLE violations
+            ADD COLUMN IF NOT EXISTS no_fly_zone_id uuid REFERENCES no_fly_zones (id) ON DELETE SET NULL,
+            ADD COLUMN IF NOT EXISTS ended_at timestamp with time zone,
+            ADD COLUMN IF NOT EXISTS point_count integer NOT NULL DEFAULT 1,
+            ADD COLUMN IF NOT EXISTS max_penetration double precision
+    """)
+    if not had_episodes:
+        op.execute("UPDATE violations SET ended_at = created_at WHERE ended_at IS NULL")
+    op.execute("ALTER TABLE flight_requests ADD COLUMN IF NOT EXISTS corridor geometry(POLYGON, 4326)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_flight_requests_corridor ON flight_requests USING gist (corridor)")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS idx_flight_requests_corridor")
+    op.execute("ALTER TABLE flight_requests DROP COLUMN IF EXISTS corridor")
+    op.execute("""
+        ALTER TABLE violations
+            DROP COLUMN IF EXISTS max_penetration,
+            DROP COLUMN IF EXISTS point_count,
+            DROP COLUMN IF EXISTS ended_at,
+            DROP COLUMN IF EXISTS no_fly_zone_id
+    """)
+    op.execute("""
+        ALTER TABLE no_fly_zones
+            DROP COLUMN IF EXISTS active,
+            DROP COLUMN IF EXISTS max_altitude,
+            DROP COLUMN IF EXISTS min_altitude
+    """)
@@ -0,0 +1,108 @@
+"""Partition drone_telemetry by time
+
+Replaces a plain drone_telemetry table with one range-partitioned on
+``timestamp``, with BIGINT ids and (id, timestamp) as primary key. The rows
+are copied into partitions covering their time range, which takes a while
+on a large table; the table is locked meanwhile. Indexes are built
+afterwards by 0004. Tables that are already partitioned are left alone.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.partitions import telemetry_partitions
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+COLUMNS = "drone_id, location, altitude, speed, heading, battery_level, status"
+
+
+def _relkind(bind) -> str:
+    """Kind of the drone_telemetry relation: r for plain, p for partitioned."""
+    return bind.execute(sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass('drone_telemetry')")).scalar()
+
+
+def _rename_old_table(suffix: str):
+    """Move the current table, its sequence and indexes out of the way."""
+    op.execute(f"ALTER TABLE drone_telemetry RENAME TO drone_telemetry_{suffix}")
+    op.execute(f"ALTER SEQUENCE IF EXISTS drone_telemetry_id_seq RENAME TO drone_telemetry_{suffix}_id_seq")
+    op.execute(f"ALTER INDEX IF EXISTS drone_telemetry_pkey RENAME TO drone_telemetry_{suffix}_pkey")
+    for index in (
+        "idx_drone_telemetry_location",
+        "ix_drone_telemetry_timestamp_brin",
+        "ix_drone_telemetry_drone_id_timestamp",
+    ):
+        op.execute(f"ALTER INDEX IF EXISTS {index} RENAME TO {index.replace('drone_telemetry', f'drone_telemetry_{suffix}')}")
+
+
+def upgrade():
+    bind = op.get_bind()
+    if _relkind(bind) != "r":
+        return
+
+    _rename_old_table("legacy")
+    op.execute("""
+        CREATE TABLE drone_telemetry (
+            id bigserial NOT NULL,
+            drone_id uuid NOT NULL REFERENCES drones (id),
+            location geometry(POINT, 4326) NOT NULL,
+            altitude double precision NOT NULL,
+            speed double precision,
+            heading double precision,
+            battery_level double precision,
+            status varchar,
+            "timestamp" timestamp with time zone NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, "timestamp")
+        ) PARTITION BY RANGE ("timestamp")
+    """)
+
+    oldest = bind.execute(sa.text('SELECT min("timestamp") FROM drone_telemetry_legacy')).scalar()
+    now = datetime.now(timezone.utc)
+    telemetry_partitions.ensure(
+        bind,
+        oldest or now,
+        telemetry_partitions.interval_start(now) + (telemetry_partitions.premake + 1) * telemetry_partitions.interval,
+    )
+
+    op.execute(f"""
+        INSERT INTO drone_telemetry (id, {COLUMNS}, "timestamp")
+        SELECT id, {COLUMNS}, COALESCE("timestamp", now()) FROM drone_telemetry_legacy
+    """)
+    op.execute("SELECT setval('drone_telemetry_id_seq', (SELECT COALESCE(max(id), 0) + 1 FROM drone_telemetry), false)")
+    op.execute("DROP TABLE drone_telemetry_legacy")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if _relkind(bind) != "p":
+        return
+
+    _rename_old_table("partitioned")
+    op.execute("""
+        CREATE TABLE drone_telemetry (
+            id serial PRIMARY KEY,
+            drone_id uuid NOT NULL REFERENCES drones (id),
+            location geometry(POINT, 4326) NOT NULL,
+            altitude double precision NOT NULL,
+            speed double precision,
+            heading double precision,
+            battery_level double precision,
+            status varchar,
+            "timestamp" timestamp with time zone DEFAULT now()
+        )
+    """)
+    op.execute(f"""
+        INSERT INTO drone_telemetry (id, {COLUMNS}, "timestamp")
+        SELECT id, {COLUMNS}, "timestamp" FROM drone_telemetry_partitioned
+    """)
+    op.execute("SELECT setval('drone_telemetry_id_seq', (SELECT COALESCE(max(id), 0) + 1 FROM drone_telemetry), false)")
+    op.execute("DROP TABLE drone_telemetry_partitioned")
+    op.execute("CREATE INDEX idx_drone_telemetry_location ON drone_telemetry USING gist (location)")
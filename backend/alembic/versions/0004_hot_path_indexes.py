@@ -0,0 +1,105 @@
+"""Indexes for the hot queries
+
+Built with CREATE INDEX CONCURRENTLY so that live tables keep taking
+writes. A partitioned table cannot be indexed concurrently as a whole, so
+its index is created on the parent only, built concurrently on every
+partition and then attached; partitions created later get it from the
+parent. Indexes left invalid by an interrupted build are rebuilt.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16
+"""
+from typing import Optional
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# (index, table, definition)
+INDEXES = (
+    ("ix_drone_telemetry_drone_id_timestamp", "drone_telemetry", '(drone_id, "timestamp")'),
+    ("ix_drone_telemetry_timestamp_brin", "drone_telemetry", 'USING brin ("timestamp")'),
+    ("idx_drone_telemetry_location", "drone_telemetry", "USING gist (location)"),
+    ("ix_violations_drone_id_created_at", "violations", "(drone_id, created_at)"),
+    ("ix_flight_requests_drone_id_status_start_time", "flight_requests", "(drone_id, status, start_time)"),
+    ("idx_flight_requests_path", "flight_requests", "USING gist (path)"),
+    ("idx_no_fly_zones_area", "no_fly_zones", "USING gist (area)"),
+)
+
+
+def _index_valid(bind, name: str) -> Optional[bool]:
+    """Whether an index is valid, None when it does not exist."""
+    return bind.execute(
+        sa.text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+        {"name": name},
+    ).scalar()
+
+
+def _create_concurrently(bind, name: str, table: str, definition: str):
+    """Create an index concurrently, replacing an invalid leftover (autocommit)."""
+    valid = _index_valid(bind, name)
+    if valid:
+        return
+    if valid is False:
+        bind.execute(sa.text(f'DROP INDEX CONCURRENTLY "{name}"'))
+    bind.execute(sa.text(f'CREATE INDEX CONCURRENTLY "{name}" ON "{table}" {definition}'))
+
+
+def _create_partitioned(bind, name: str, table: str, definition: str):
+    """Index every partition concurrently and attach them to a parent index (autocommit)."""
+    if _index_valid(bind, name):
+        return
+    bind.execute(sa.text(f'CREATE INDEX IF NOT EXISTS "{name}" ON ONLY "{table}" {definition}'))
+
+    partitions = bind.execute(
+        sa.text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:table)"
+        ),
+        {"table": table},
+    ).scalars().all()
+    attached = set(bind.execute(
+        sa.text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_index x ON x.indexrelid = i.inhrelid JOIN pg_class c ON c.oid = x.indrelid "
+            "WHERE i.inhparent = to_regclass(:name)"
+        ),
+        {"name": name},
+    ).scalars())
+
+    for partition in partitions:
+        if partition in attached:
+            continue
+        child = f"{partition}_{name.split(table + '_', 1)[-1]}"[:63]
+        _create_concurrently(bind, child, partition, definition)
+        bind.execute(sa.text(f'ALTER INDEX "{name}" ATTACH PARTITION "{child}"'))
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        for name, table, definition in INDEXES:
+            kind = bind.execute(
+                sa.text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"),
+                {"table": table},
+            ).scalar()
+            if kind == "p":
+                _create_partitioned(bind, name, table, definition)
+            else:
+                _create_concurrently(bind, name, table, definition)
+
+
+def downgrade():
+    # The GiST indexes on path, area and location predate this revision
+    for name in (
+        "ix_flight_requests_drone_id_status_start_time",
+        "ix_violations_drone_id_created_at",
+        "ix_drone_telemetry_timestamp_brin",
+        "ix_drone_telemetry_drone_id_timestamp",
+    ):
+        op.execute(f'DROP INDEX IF EXISTS "{name}"')
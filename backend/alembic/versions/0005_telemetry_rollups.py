@@ -0,0 +1,90 @@
+"""Multi-resolution telemetry rollups
+
+Creates telemetry_rollups, range-partitioned on ``bucket``, and fills it
+from the stored telemetry; from then on it is kept up to date as telemetry
+is written. The backfill reads all of drone_telemetry once.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.partitions import rollup_partitions
+from app.db.rollups import RESOLUTIONS
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS telemetry_rollups (
+            drone_id uuid NOT NULL REFERENCES drones (id) ON DELETE CASCADE,
+            resolution integer NOT NULL,
+            bucket timestamp with time zone NOT NULL,
+            point_count integer NOT NULL,
+            first_time timestamp with time zone NOT NULL,
+            first_longitude double precision NOT NULL,
+            first_latitude double precision NOT NULL,
+            last_time timestamp with time zone NOT NULL,
+            last_longitude double precision NOT NULL,
+            last_latitude double precision NOT NULL,
+            sum_longitude double precision NOT NULL,
+            sum_latitude double precision NOT NULL,
+            sum_altitude double precision NOT NULL,
+            min_altitude double precision NOT NULL,
+            max_altitude double precision NOT NULL,
+            sum_speed double precision NOT NULL,
+            speed_count integer NOT NULL,
+            min_battery double precision,
+            PRIMARY KEY (drone_id, resolution, bucket)
+        ) PARTITION BY RANGE (bucket)
+    """)
+
+    bind = op.get_bind()
+    oldest = bind.execute(sa.text('SELECT min("timestamp") FROM drone_telemetry')).scalar()
+    now = datetime.now(timezone.utc)
+    rollup_partitions.ensure(
+        bind,
+        oldest or now,
+        rollup_partitions.interval_start(now) + (rollup_partitions.premake + 1) * rollup_partitions.interval,
+    )
+    if oldest is None:
+        return
+
+    for resolution in RESOLUTIONS.values():
+        op.execute(f"""
+            INSERT INTO telemetry_rollups
+            SELECT
+                drone_id,
+                {resolution},
+                to_timestamp(floor(extract(epoch FROM "timestamp") / {resolution}) * {resolution}) AS bucket,
+                count(*),
+                min("timestamp"),
+                (array_agg(ST_X(location) ORDER BY "timestamp"))[1],
+                (array_agg(ST_Y(location) ORDER BY "timestamp"))[1],
+                max("timestamp"),
+                (array_agg(ST_X(location) ORDER BY "timestamp" DESC))[1],
+                (array_agg(ST_Y(location) ORDER BY "timestamp" DESC))[1],
+                sum(ST_X(location)),
+                sum(ST_Y(location)),
+                sum(altitude),
+                min(altitude),
+                max(altitude),
+                COALESCE(sum(speed), 0),
+                count(speed),
+                min(battery_level)
+            FROM drone_telemetry
+            GROUP BY drone_id, bucket
+            ON CONFLICT DO NOTHING
+        """)
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS telemetry_rollups")
@@ -5,11 +5,12 @@ from sqlalchemy import func
 from datetime import datetime, timedelta
 
 from app.api.auth import get_current_active_user
+from app.core.telemetry_history import telemetry_history
 from app.db.session import get_db
 from app.models.user import User
 from app.models.drone import Drone
 from app.models.flight_request import FlightRequest, FlightStatus
-from app.models.telemetry import Telemetry 
+from app.models.telemetry import DroneTelemetry
 from app.models.violation import Violation, ViolationType
 from app.models.no_fly_zone import NoFlyZone
 
@@ -88,8 +89,8 @@ def get_recent_activity(
     # Get recent violations
     recent_violations = (
         db.query(Violation)
-        .filter(Violation.timestamp >= start_date)
-        .order_by(Violation.timestamp.desc())
+        .filter(Violation.created_at >= start_date)
+        .order_by(Violation.created_at.desc())
         .limit(10)
         .all()
     )
@@ -119,7 +120,7 @@ def get_recent_activity(
             "id": str(v.id),
             "drone_id": str(v.drone_id),
             "type": v.type.value,
-            "timestamp": v.timestamp.isoformat(),
+            "timestamp": v.created_at.isoformat(),
             "description": v.description,
         }
         for v in recent_violations
@@ -228,7 +229,7 @@ def get_violations_by_type(
     # Get violations in the date range
     violations = (
         db.query(Violation)
-        .filter(Violation.timestamp >= start_date)
+        .filter(Violation.created_at >= start_date)
         .all()
     )
     
@@ -266,8 +267,8 @@ def get_active_drones(
     
     # Get active drones based on telemetry
     active_drone_ids = (
-        db.query(Telemetry.drone_id)
-        .filter(Telemetry.timestamp >= start_date)
+        db.query(DroneTelemetry.drone_id)
+        .filter(DroneTelemetry.timestamp >= start_date)
         .distinct()
         .all()
     )
@@ -295,4 +296,21 @@ def get_active_drones(
     return {
         "count": len(formatted_drones),
         "drones": formatted_drones,
-    } 
\ No newline at end of file
+    } 
+
+
+@router.get("/metrics/ingest")
+def get_ingest_metrics(
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """Get telemetry ingest counters, live latency and history memory of this API process."""
+    # Imported here, the MQTT client imports the WebSocket module which imports app.api
+    from app.core.mqtt_client import mqtt_client
+    
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    
+    return {**mqtt_client.stats(), "history": telemetry_history.stats()}
@@ -4,6 +4,10 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.api.auth import get_current_active_user
+from app.core.corridors import corridor_cache
+from app.core.drone_registry import drone_registry
+from app.core.last_known import last_known
+from app.core.telemetry_history import telemetry_history
 from app.db.session import get_db
 from app.models.user import User
 from app.models.drone import Drone
@@ -51,6 +55,7 @@ def create_drone(
     db.add(db_drone)
     db.commit()
     db.refresh(db_drone)
+    drone_registry.put(db_drone)
     return db_drone
 
 
@@ -117,6 +122,7 @@ def update_drone(
     
     db.commit()
     db.refresh(drone)
+    drone_registry.put(drone)
     return drone
 
 
@@ -143,4 +149,8 @@ def delete_drone(
     
     db.delete(drone)
     db.commit()
+    drone_registry.remove(drone_id)
+    last_known.remove(str(drone_id))
+    telemetry_history.remove(drone_id)
+    corridor_cache.remove_drone(drone_id)
     return None 
\ No newline at end of file
@@ -6,11 +6,17 @@ from shapely.geometry import shape
 from geoalchemy2.shape import from_shape
 
 from app.api.auth import get_current_active_user
+from app.core.corridors import (
+    ACTIVE_FLIGHT_STATUSES,
+    corridor_cache,
+    corridor_polygon,
+    ensure_corridor,
+)
+from app.core.zone_index import zone_index
 from app.db.session import get_db
 from app.models.user import User
 from app.models.drone import Drone
 from app.models.flight_request import FlightRequest, FlightStatus
-from app.models.no_fly_zone import NoFlyZone
 from app.schemas.flight_request import (
     FlightRequestCreate,
     FlightRequestResponse,
@@ -31,19 +37,16 @@ def check_flight_route(
     # Convert GeoJSON to shapely geometry
     route_shape = shape(route_data.path)
     
-    # Get all no-fly zones
-    no_fly_zones = db.query(NoFlyZone).all()
-    
-    # Check for intersections
+    # Check for intersections with zones active at the requested altitude
     violations = []
-    for zone in no_fly_zones:
-        zone_shape = zone.area.data
-        if route_shape.intersects(zone_shape):
-            violations.append({
-                "zone_id": str(zone.id),
-                "zone_name": zone.name,
-                "description": zone.description,
-            })
+    for zone in zone_index.zones_along(route_shape, route_data.altitude):
+        violations.append({
+            "zone_id": str(zone.id),
+            "zone_name": zone.name,
+            "description": zone.description,
+            "min_altitude": zone.min_altitude,
+            "max_altitude": zone.max_altitude,
+        })
     
     return {
         "is_valid": len(violations) == 0,
@@ -117,19 +120,17 @@ def create_flight_request(
     # Convert GeoJSON to shapely geometry
     route_shape = shape(flight_data.path)
     
-    # Get all no-fly zones
-    no_fly_zones = db.query(NoFlyZone).all()
+    # Corridor the drone will have to stay in, computed once here
+    corridor_shape = corridor_polygon(route_shape)
     
-    # Check for intersections
+    # Check the corridor against zones active at the requested altitude
     status = FlightStatus.PENDING
     rejection_reason = None
     
-    for zone in no_fly_zones:
-        zone_shape = zone.area.data
-        if route_shape.intersects(zone_shape):
-            status = FlightStatus.REJECTED
-            rejection_reason = f"Flight path intersects with no-fly zone: {zone.name}"
-            break
+    for zone in zone_index.zones_along(corridor_shape, flight_data.altitude):
+        status = FlightStatus.REJECTED
+        rejection_reason = f"Flight path intersects with no-fly zone: {zone.name}"
+        break
     
     # Create flight request
     flight_request = FlightRequest(
@@ -138,6 +139,7 @@ def create_flight_request(
         end_time=flight_data.end_time,
         altitude=flight_data.altitude,
         path=from_shape(route_shape, srid=4326),
+        corridor=from_shape(corridor_shape, srid=4326),
         status=status,
         rejection_reason=rejection_reason,
     )
@@ -205,7 +207,13 @@ def update_flight_request(
     if flight_data.rejection_reason is not None:
         flight_request.rejection_reason = flight_data.rejection_reason
     
+    if flight_request.status in ACTIVE_FLIGHT_STATUSES:
+        ensure_corridor(flight_request)
+    
     db.commit()
     db.refresh(flight_request)
     
+    # Keep the active corridor used for conformance checks in sync
+    corridor_cache.update(flight_request)
+    
     return flight_request 
\ No newline at end of file
@@ -7,6 +7,7 @@ from shapely.geometry import shape
 from geoalchemy2.shape import from_shape
 
 from app.api.auth import get_current_active_user
+from app.core.zone_index import zone_index
 from app.db.session import get_db
 from app.models.user import User
 from app.models.no_fly_zone import NoFlyZone
@@ -60,6 +61,7 @@ def create_no_fly_zone(
         db.add(no_fly_zone)
         db.commit()
         db.refresh(no_fly_zone)
+        zone_index.upsert(no_fly_zone)
         
         return no_fly_zone
     except IntegrityError:
@@ -133,6 +135,7 @@ def update_no_fly_zone(
     try:
         db.commit()
         db.refresh(zone)
+        zone_index.upsert(zone)
         return zone
     except IntegrityError:
         db.rollback()
@@ -165,5 +168,6 @@ def delete_no_fly_zone(
     
     db.delete(zone)
     db.commit()
+    zone_index.remove(zone_id)
     
     return None 
\ No newline at end of file
@@ -1,35 +1,75 @@
-from typing import Any, List
+from typing import Any, List, Optional, Union
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, status
+import numpy as np
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
-from datetime import datetime, timedelta
-from geoalchemy2.shape import from_shape
-from shapely.geometry import Point
+from datetime import datetime, timedelta, timezone
 
 from app.api.auth import get_current_active_user, get_user_from_token
+from app.core.drone_registry import drone_registry
+from app.core.geo import meters_per_pixel, simplify_track
+from app.core.telemetry_history import telemetry_history
+from app.core.telemetry_store import store_telemetry
+from app.db.rollups import RESOLUTIONS, choose_resolution, telemetry_rollups
 from app.db.session import get_db
+from app.db.telemetry_writer import TelemetryRow
 from app.models.user import User
-from app.models.drone import Drone
-from app.models.telemetry import Telemetry
-from app.models.no_fly_zone import NoFlyZone
-from app.models.violation import Violation, ViolationType
-from app.schemas.telemetry import TelemetryCreate, TelemetryResponse
+from app.models.telemetry import DroneTelemetry
+from app.models.violation import Violation
+from app.schemas.telemetry import TelemetryCreate, TelemetryResponse, TelemetryRollupResponse
 
 router = APIRouter()
 
+# Telemetry columns in the shape of TelemetryResponse
+TELEMETRY_COLUMNS = (
+    DroneTelemetry.drone_id,
+    func.ST_Y(DroneTelemetry.location).label("latitude"),
+    func.ST_X(DroneTelemetry.location).label("longitude"),
+    DroneTelemetry.altitude,
+    DroneTelemetry.speed,
+    DroneTelemetry.heading,
+    DroneTelemetry.battery_level,
+    DroneTelemetry.status,
+    DroneTelemetry.timestamp,
+)
 
-@router.get("/drone/{drone_id}", response_model=List[TelemetryResponse])
+
+@router.get("/drone/{drone_id}", response_model=List[Union[TelemetryRollupResponse, TelemetryResponse]])
 def get_drone_telemetry(
     drone_id: UUID,
     limit: int = 100,
     start_time: datetime = None,
     end_time: datetime = None,
+    resolution: str = "raw",
+    tolerance: float = None,
+    zoom: float = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
-    """Get telemetry data for a specific drone."""
+    """Get telemetry data for a specific drone.
+    
+    ``resolution`` is ``raw`` (stored points), a rollup (``10s``, ``1m``,
+    ``10m``) or ``auto``: raw points when the range holds at most ``limit``
+    of them, otherwise the finest rollup that covers the range in ``limit``
+    buckets.
+    
+    ``tolerance`` (meters) or ``zoom`` (web map zoom level, one pixel of
+    tolerance) simplifies the trail with Douglas-Peucker, always keeping
+    the points where violations started or ended.
+    """
+    if resolution not in RESOLUTIONS and resolution not in ("raw", "auto"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"resolution must be raw, auto or one of {', '.join(RESOLUTIONS)}",
+        )
+    if (tolerance is not None and tolerance < 0) or (zoom is not None and not 0 <= zoom <= 30):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="tolerance must not be negative and zoom must be between 0 and 30",
+        )
     
-    drone = db.query(Drone).filter(Drone.id == drone_id).first()
+    drone = drone_registry.get(db, drone_id)
     if not drone:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -44,17 +84,55 @@ def get_drone_telemetry(
         )
     
     
-    query = db.query(Telemetry).filter(Telemetry.drone_id == drone_id)
+    points = _drone_telemetry(db, drone_id, limit, start_time, end_time, resolution)
+    
+    # Map trails need far fewer vertices than are stored
+    if tolerance is None and zoom is not None and points:
+        tolerance = meters_per_pixel(zoom, _value(points[0], "latitude"))
+    if tolerance is not None and len(points) > 2:
+        points = _simplify(db, drone_id, points, tolerance)
+    
+    return points
+
+
+def _value(point: Any, name: str) -> Any:
+    """Field of a telemetry point, a dict or a row."""
+    return point[name] if isinstance(point, dict) else getattr(point, name)
+
+
+def _drone_telemetry(
+    db: Session,
+    drone_id: UUID,
+    limit: int,
+    start_time: Optional[datetime],
+    end_time: Optional[datetime],
+    resolution: str,
+) -> List[Any]:
+    """Get the telemetry points of a drone at a resolution, oldest first."""
+    if resolution in RESOLUTIONS:
+        return telemetry_rollups.query(db, drone_id, RESOLUTIONS[resolution], limit, start_time, end_time)
+    
+    # Recent trails are answered from memory when it holds the whole range
+    recent = telemetry_history.query(drone_id, limit, start_time, end_time)
+    if recent is not None and (resolution == "raw" or len(recent) < limit):
+        return recent
+    
+    query = db.query(*TELEMETRY_COLUMNS).filter(DroneTelemetry.drone_id == drone_id)
     
     
     if start_time:
-        query = query.filter(Telemetry.timestamp >= start_time)
+        query = query.filter(DroneTelemetry.timestamp >= start_time)
     
     if end_time:
-        query = query.filter(Telemetry.timestamp <= end_time)
+        query = query.filter(DroneTelemetry.timestamp <= end_time)
+    
     
+    # A range with more points than the budget is answered from a rollup
+    if resolution == "auto" and start_time and query.offset(limit).first() is not None:
+        end = end_time or datetime.now(timezone.utc)
+        return telemetry_rollups.query(db, drone_id, choose_resolution(start_time, end, limit), limit, start_time, end)
     
-    telemetry_data = query.order_by(Telemetry.timestamp.desc()).limit(limit).all()
+    telemetry_data = query.order_by(DroneTelemetry.timestamp.desc()).limit(limit).all()
     
     
     telemetry_data.reverse()
@@ -62,6 +140,35 @@ def get_drone_telemetry(
     return telemetry_data
 
 
+def _simplify(db: Session, drone_id: UUID, points: List[Any], tolerance: float) -> List[Any]:
+    """Simplify a trail to ``tolerance`` meters, keeping the points where violations started or ended."""
+    coords = np.array([(_value(point, "longitude"), _value(point, "latitude")) for point in points])
+    times = np.array([_value(point, "timestamp").timestamp() for point in points])
+    first, last = _value(points[0], "timestamp"), _value(points[-1], "timestamp")
+    
+    violations = db.query(Violation.created_at, Violation.ended_at).filter(
+        Violation.drone_id == drone_id,
+        Violation.created_at <= last,
+        or_(Violation.ended_at.is_(None), Violation.ended_at >= first),
+    ).all()
+    moments = np.array([
+        moment.timestamp()
+        for violation in violations
+        for moment in violation
+        if moment is not None and first <= moment <= last
+    ])
+    
+    keep = None
+    if len(moments):
+        # The point closest in time to each violation boundary
+        after = np.clip(np.searchsorted(times, moments), 1, len(times) - 1)
+        before = after - 1
+        keep = np.where(moments - times[before] <= times[after] - moments, before, after)
+    
+    mask = simplify_track(coords, tolerance, keep)
+    return [point for point, kept in zip(points, mask) if kept]
+
+
 @router.get("/latest/{drone_id}", response_model=TelemetryResponse)
 def get_latest_telemetry(
     drone_id: UUID,
@@ -70,7 +177,7 @@ def get_latest_telemetry(
 ) -> Any:
     """Get the latest telemetry data for a specific drone."""
     
-    drone = db.query(Drone).filter(Drone.id == drone_id).first()
+    drone = drone_registry.get(db, drone_id)
     if not drone:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -85,9 +192,13 @@ def get_latest_telemetry(
         )
     
     
-    latest_telemetry = db.query(Telemetry).filter(
-        Telemetry.drone_id == drone_id
-    ).order_by(Telemetry.timestamp.desc()).first()
+    recent = telemetry_history.query(drone_id, 1)
+    if recent:
+        return recent[0]
+    
+    latest_telemetry = db.query(*TELEMETRY_COLUMNS).filter(
+        DroneTelemetry.drone_id == drone_id
+    ).order_by(DroneTelemetry.timestamp.desc()).first()
     
     if not latest_telemetry:
         raise HTTPException(
@@ -106,7 +217,7 @@ def create_telemetry(
 ) -> Any:
     """Create new telemetry data entry (for testing only)."""
     
-    drone = db.query(Drone).filter(Drone.id == telemetry_data.drone_id).first()
+    drone = drone_registry.get(db, telemetry_data.drone_id)
     if not drone:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -121,26 +232,19 @@ def create_telemetry(
         )
     
     
-    point = Point(telemetry_data.longitude, telemetry_data.latitude)
-    
-    
-    telemetry = Telemetry(
+    telemetry = TelemetryRow(
         drone_id=telemetry_data.drone_id,
-        timestamp=telemetry_data.timestamp or datetime.utcnow(),
-        latitude=telemetry_data.latitude,
         longitude=telemetry_data.longitude,
+        latitude=telemetry_data.latitude,
         altitude=telemetry_data.altitude,
         speed=telemetry_data.speed,
         heading=telemetry_data.heading,
         battery_level=telemetry_data.battery_level,
-        position=from_shape(point, srid=4326)
+        status=telemetry_data.status,
+        timestamp=telemetry_data.timestamp or datetime.now(timezone.utc),
     )
     
-    db.add(telemetry)
-    db.commit()
-    
-    
-    check_for_violations(db, telemetry)
+    store_telemetry(db, [telemetry])
     
     return {"message": "Telemetry data received"}
 
@@ -149,7 +253,7 @@ def create_telemetry(
 @router.websocket("/ws/{drone_id}")
 async def websocket_telemetry(
     websocket: WebSocket,
-    drone_id: str,
+    drone_id: UUID,
     token: str,
     db: Session = Depends(get_db),
 ):
@@ -162,7 +266,7 @@ async def websocket_telemetry(
             return
         
         
-        drone = db.query(Drone).filter(Drone.id == drone_id).first()
+        drone = drone_registry.get(db, drone_id)
         if not drone:
             await websocket.close(code=1008)
             return
@@ -180,32 +284,24 @@ async def websocket_telemetry(
                 
                 
                 if "latitude" in data and "longitude" in data:
-                    point = Point(data["longitude"], data["latitude"])
-                    
-                    
-                    telemetry = Telemetry(
-                        drone_id=drone_id,
-                        timestamp=datetime.utcnow(),
-                        latitude=data["latitude"],
+                    telemetry = TelemetryRow(
+                        drone_id=drone.id,
                         longitude=data["longitude"],
+                        latitude=data["latitude"],
                         altitude=data.get("altitude", 0),
                         speed=data.get("speed", 0),
                         heading=data.get("heading", 0),
                         battery_level=data.get("battery_level", 100),
-                        position=from_shape(point, srid=4326)
+                        status=data.get("status"),
+                        timestamp=datetime.now(timezone.utc),
                     )
                     
-                    db.add(telemetry)
-                    db.commit()
-                    db.refresh(telemetry)
-                    
-                    
-                    violations = check_for_violations(db, telemetry)
+                    violations = store_telemetry(db, [telemetry])
                     
                     
                     await websocket.send_json({
                         "status": "ok",
-                        "violations": violations
+                        "violations": [violation for _, violation in violations]
                     })
                 else:
                     await websocket.send_json({
@@ -223,47 +319,3 @@ async def websocket_telemetry(
             await websocket.close(code=1011) 
         except:
             pass
-
-
-def check_for_violations(db: Session, telemetry: Telemetry) -> List[dict]:
-    """Check if telemetry data violates any no-fly zones."""
-    violations = []
-    
-    
-    no_fly_zones = db.query(NoFlyZone).filter(NoFlyZone.active == True).all()
-    
-    for zone in no_fly_zones:
-        
-        if db.query(
-            zone.area.ST_Contains(telemetry.position)
-        ).scalar():
-            
-            altitude_violation = False
-            if (zone.min_altitude is not None and telemetry.altitude < zone.min_altitude) or \
-               (zone.max_altitude is not None and telemetry.altitude > zone.max_altitude):
-                altitude_violation = True
-            
-            
-            violation = Violation(
-                drone_id=telemetry.drone_id,
-                no_fly_zone_id=zone.id,
-                timestamp=telemetry.timestamp,
-                position=telemetry.position,
-                type=ViolationType.NO_FLY_ZONE,
-                description=f"Drone entered no-fly zone: {zone.name}" + 
-                            (f" (altitude violation: {telemetry.altitude}m)" if altitude_violation else "")
-            )
-            
-            db.add(violation)
-            db.commit()
-            
-            violations.append({
-                "zone_id": str(zone.id),
-                "zone_name": zone.name,
-                "type": "NO_FLY_ZONE",
-                "description": violation.description
-            })
-    
-    
-    
-    return violations 
\ No newline at end of file
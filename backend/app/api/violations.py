@@ -1,6 +1,7 @@
 from typing import Any, List
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 
@@ -44,15 +45,15 @@ def get_violations(
         if not current_user.is_admin:
             query = query.join(Drone, Violation.drone_id == Drone.id).filter(Drone.user_id == current_user.id)
     
-    # Apply time filters if provided
+    # Apply time filters if provided, keeping episodes that overlap the range
     if start_time:
-        query = query.filter(Violation.timestamp >= start_time)
+        query = query.filter(or_(Violation.ended_at == None, Violation.ended_at >= start_time))
     
     if end_time:
-        query = query.filter(Violation.timestamp <= end_time)
+        query = query.filter(Violation.created_at <= end_time)
     
     # Get the violations, limited by the limit parameter
-    violations = query.order_by(Violation.timestamp.desc()).limit(limit).all()
+    violations = query.order_by(Violation.created_at.desc()).limit(limit).all()
     
     return violations
 
@@ -68,15 +69,17 @@ def get_recent_violations(
     # Calculate the start time
     start_time = datetime.utcnow() - timedelta(hours=hours)
     
-    # Build the base query
-    query = db.query(Violation).filter(Violation.timestamp >= start_time)
+    # Build the base query, including episodes that are still open
+    query = db.query(Violation).filter(
+        or_(Violation.ended_at == None, Violation.ended_at >= start_time)
+    )
     
     # Filter by user's drones if not admin
     if not current_user.is_admin:
         query = query.join(Drone, Violation.drone_id == Drone.id).filter(Drone.user_id == current_user.id)
     
     # Get the violations, limited by the limit parameter
-    violations = query.order_by(Violation.timestamp.desc()).limit(limit).all()
+    violations = query.order_by(Violation.created_at.desc()).limit(limit).all()
     
     return violations
 
@@ -109,22 +112,22 @@ def get_drone_violations(
     # Build the query
     query = db.query(Violation).filter(Violation.drone_id == drone_id)
     
-    # Apply time filters if provided
+    # Apply time filters if provided, keeping episodes that overlap the range
     if start_time:
-        query = query.filter(Violation.timestamp >= start_time)
+        query = query.filter(or_(Violation.ended_at == None, Violation.ended_at >= start_time))
     
     if end_time:
-        query = query.filter(Violation.timestamp <= end_time)
+        query = query.filter(Violation.created_at <= end_time)
     
     # Get the violations, limited by the limit parameter
-    violations = query.order_by(Violation.timestamp.desc()).limit(limit).all()
+    violations = query.order_by(Violation.created_at.desc()).limit(limit).all()
     
     return violations
 
 
 @router.get("/{violation_id}", response_model=ViolationResponse)
 def get_violation(
-    violation_id: UUID,
+    violation_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
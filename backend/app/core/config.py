@@ -26,6 +26,67 @@ class Settings(BaseSettings):
     MQTT_CLIENT_ID: str = os.getenv("MQTT_CLIENT_ID", "sergex_air_backend")
     MQTT_TELEMETRY_TOPIC: str = "drones/+/telemetry"
     
+    # Telemetry ingest pipeline
+    # Every API process that ingests stores every row, so only a single-worker
+    # API ingests by default; run app.ingest next to a multi-worker API
+    INGEST_IN_API: bool = os.getenv(
+        "INGEST_IN_API", "true" if int(os.getenv("WEB_CONCURRENCY", "1")) <= 1 else "false"
+    ).lower() == "true"
+    INGEST_SHARE_GROUP: str = os.getenv("INGEST_SHARE_GROUP", "sergex_ingest")
+    INGEST_QUEUE_SIZE: int = int(os.getenv("INGEST_QUEUE_SIZE", "10000"))
+    INGEST_BATCH_SIZE: int = int(os.getenv("INGEST_BATCH_SIZE", "500"))
+    INGEST_BATCH_INTERVAL: float = float(os.getenv("INGEST_BATCH_INTERVAL", "0.25"))  # seconds
+    # Above this queue fill ratio history rows are sampled per drone
+    INGEST_HIGH_WATER: float = float(os.getenv("INGEST_HIGH_WATER", "0.8"))
+    INGEST_SAMPLE_INTERVAL: float = float(os.getenv("INGEST_SAMPLE_INTERVAL", "1.0"))  # seconds
+    LIVE_PUBLISH_INTERVAL: float = float(os.getenv("LIVE_PUBLISH_INTERVAL", "0.1"))  # seconds
+    
+    # WebSocket fan-out
+    WS_SEND_QUEUE_SIZE: int = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+    WS_VIEWPORT_CELL_SIZE: float = float(os.getenv("WS_VIEWPORT_CELL_SIZE", "0.25"))  # degrees
+    WS_VIEWPORT_MAX_CELLS: int = int(os.getenv("WS_VIEWPORT_MAX_CELLS", "256"))
+    WS_THROTTLE_TICK: float = float(os.getenv("WS_THROTTLE_TICK", "0.1"))  # seconds
+    # Drones not heard from for longer are left out of the snapshot sent on subscribe
+    WS_SNAPSHOT_MAX_AGE: float = float(os.getenv("WS_SNAPSHOT_MAX_AGE", "3600"))  # seconds
+    # Bus between ingest processes and API workers: postgres, redis or local
+    # (the default for a single API worker that ingests itself)
+    FANOUT_BACKEND: str = os.getenv(
+        "FANOUT_BACKEND", "local" if INGEST_IN_API and int(os.getenv("WEB_CONCURRENCY", "1")) <= 1 else "postgres"
+    )
+    FANOUT_CHANNEL: str = os.getenv("FANOUT_CHANNEL", "sergex_live")
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    
+    # Telemetry partitions and retention
+    # drone_telemetry partitions: interval, how many to create ahead, and
+    # retention after which whole partitions are dropped. Retention is opt-in,
+    # 0 keeps everything
+    TELEMETRY_PARTITION_DAYS: int = int(os.getenv("TELEMETRY_PARTITION_DAYS", "1"))
+    TELEMETRY_PARTITION_PREMAKE: int = int(os.getenv("TELEMETRY_PARTITION_PREMAKE", "3"))
+    TELEMETRY_RETENTION_DAYS: int = int(os.getenv("TELEMETRY_RETENTION_DAYS", "0"))
+    # Rollups are much smaller than raw telemetry and can be kept longer
+    TELEMETRY_ROLLUP_PARTITION_DAYS: int = int(os.getenv("TELEMETRY_ROLLUP_PARTITION_DAYS", "7"))
+    TELEMETRY_ROLLUP_RETENTION_DAYS: int = int(os.getenv("TELEMETRY_ROLLUP_RETENTION_DAYS", "0"))
+    TELEMETRY_PARTITION_CHECK_INTERVAL: float = float(os.getenv("TELEMETRY_PARTITION_CHECK_INTERVAL", "3600"))  # seconds
+    
+    # In-process caches
+    # Recent telemetry kept in memory per drone for history queries (0 disables).
+    # Only complete, and so only used, when this process writes all telemetry:
+    # a single API worker that ingests itself
+    TELEMETRY_SINGLE_WRITER: bool = os.getenv(
+        "TELEMETRY_SINGLE_WRITER",
+        "true" if INGEST_IN_API and int(os.getenv("WEB_CONCURRENCY", "1")) <= 1 else "false",
+    ).lower() == "true"
+    TELEMETRY_HISTORY_SIZE: int = int(os.getenv("TELEMETRY_HISTORY_SIZE", "600"))  # points per drone
+    TELEMETRY_HISTORY_WINDOW: float = float(os.getenv("TELEMETRY_HISTORY_WINDOW", "600"))  # seconds
+    TELEMETRY_HISTORY_MAX_DRONES: int = int(os.getenv("TELEMETRY_HISTORY_MAX_DRONES", "2000"))
+    DRONE_REGISTRY_MAX_SIZE: int = int(os.getenv("DRONE_REGISTRY_MAX_SIZE", "100000"))
+    DRONE_REGISTRY_TTL: float = float(os.getenv("DRONE_REGISTRY_TTL", "300"))  # seconds
+    DRONE_REGISTRY_NEGATIVE_TTL: float = float(os.getenv("DRONE_REGISTRY_NEGATIVE_TTL", "30"))  # seconds
+    CORRIDOR_WIDTH_METERS: float = float(os.getenv("CORRIDOR_WIDTH_METERS", "200"))
+    CORRIDOR_CACHE_REFRESH: float = float(os.getenv("CORRIDOR_CACHE_REFRESH", "60"))  # seconds
+    ZONE_INDEX_REFRESH: float = float(os.getenv("ZONE_INDEX_REFRESH", "60"))  # seconds
+    VIOLATION_EPISODE_TIMEOUT: float = float(os.getenv("VIOLATION_EPISODE_TIMEOUT", "30"))  # seconds
+    
     class Config:
         case_sensitive = True
 
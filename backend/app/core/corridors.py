@@ -0,0 +1,152 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, NamedTuple, Optional
+from uuid import UUID
+
+import shapely
+from geoalchemy2.shape import from_shape, to_shape
+from shapely.geometry.base import BaseGeometry
+
+from app.core.config import settings
+from app.core.geo import metric_buffer
+from app.db.session import SessionLocal
+from app.models.flight_request import FlightRequest, FlightStatus
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_FLIGHT_STATUSES = (FlightStatus.APPROVED, FlightStatus.IN_PROGRESS)
+
+
+class Corridor(NamedTuple):
+    """Prepared corridor of an active flight request."""
+    flight_request_id: UUID
+    start_time: datetime
+    area: BaseGeometry
+
+
+def corridor_polygon(path: BaseGeometry) -> BaseGeometry:
+    """Compute the corridor polygon of CORRIDOR_WIDTH_METERS around a path."""
+    return metric_buffer(path, settings.CORRIDOR_WIDTH_METERS / 2)
+
+
+def ensure_corridor(flight_request: FlightRequest):
+    """Store the corridor polygon on a flight request that has none yet."""
+    if flight_request.corridor is None:
+        path = to_shape(flight_request.path)
+        flight_request.corridor = from_shape(corridor_polygon(path), srid=4326)
+
+
+def build_corridor(flight_request: FlightRequest) -> Corridor:
+    """Prepare the stored corridor of a flight request."""
+    if flight_request.corridor is not None:
+        area = to_shape(flight_request.corridor)
+    else:
+        # Requests created before corridors were stored
+        area = corridor_polygon(to_shape(flight_request.path))
+    shapely.prepare(area)
+    return Corridor(flight_request.id, flight_request.start_time, area)
+
+
+class CorridorCache:
+    """Per-drone cache of the active flight corridor.
+
+    Holds the corridor of the latest approved or in-progress flight request
+    of each drone. The flights API updates it when a request changes status,
+    and the whole cache is reloaded every ``refresh_interval`` seconds to pick
+    up changes made by other processes. Reloads run on a background thread,
+    one at a time, and lookups keep using the current corridors meanwhile.
+    """
+
+    def __init__(self, refresh_interval: float):
+        """Initialize the cache."""
+        self.refresh_interval = refresh_interval
+        self._corridors: Dict[UUID, Corridor] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+        # Counts local updates, a reload that overlaps one is discarded
+        self._changes = 0
+
+    def load(self):
+        """Load corridors for all active flight requests."""
+        with self._lock:
+            changes = self._changes
+        db = SessionLocal()
+        try:
+            flight_requests = (
+                db.query(FlightRequest)
+                .filter(FlightRequest.status.in_(ACTIVE_FLIGHT_STATUSES))
+                .order_by(FlightRequest.start_time.desc())
+                .all()
+            )
+        finally:
+            db.close()
+
+        corridors = {}
+        for flight_request in flight_requests:
+            if flight_request.drone_id not in corridors:
+                corridors[flight_request.drone_id] = build_corridor(flight_request)
+
+        with self._lock:
+            if self._changes != changes:
+                # Updated meanwhile, the loaded corridors may already be stale
+                logger.info("Flight corridors changed while loading, keeping the current ones")
+                return
+            self._corridors = corridors
+            self._loaded_at = time.monotonic()
+        logger.info(f"Loaded {len(corridors)} active flight corridors")
+
+    def get(self, drone_id: UUID) -> Optional[Corridor]:
+        """Get the active corridor of a drone, if it has one."""
+        self._refresh_if_stale()
+        return self._corridors.get(drone_id)
+
+    def _refresh_if_stale(self):
+        """Start a background reload when the cache is stale and none is running."""
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at <= self.refresh_interval:
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh, name="corridor-cache-refresh", daemon=True).start()
+
+    def _refresh(self):
+        """Reload the cache, waiting a whole interval before retrying a failed reload."""
+        try:
+            self.load()
+        except Exception as e:
+            logger.error(f"Error reloading flight corridors: {e}")
+            self._loaded_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def update(self, flight_request: FlightRequest):
+        """Add or evict the corridor of a flight request after a status change."""
+        with self._lock:
+            self._changes += 1
+            current = self._corridors.get(flight_request.drone_id)
+
+            if flight_request.status in ACTIVE_FLIGHT_STATUSES:
+                if (
+                    current is None
+                    or current.flight_request_id == flight_request.id
+                    or current.start_time <= flight_request.start_time
+                ):
+                    self._corridors[flight_request.drone_id] = build_corridor(flight_request)
+            elif current is not None and current.flight_request_id == flight_request.id:
+                del self._corridors[flight_request.drone_id]
+                # The drone may have another active flight, reload on next lookup
+                self._loaded_at = None
+
+    def remove_drone(self, drone_id: UUID):
+        """Forget the corridor of a deleted drone."""
+        with self._lock:
+            self._changes += 1
+            self._corridors.pop(drone_id, None)
+
+
+corridor_cache = CorridorCache(refresh_interval=settings.CORRIDOR_CACHE_REFRESH)
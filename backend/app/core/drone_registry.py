@@ -0,0 +1,142 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.drone import Drone
+
+logger = logging.getLogger(__name__)
+
+
+class DroneInfo(NamedTuple):
+    """Cached drone attributes needed on the telemetry path."""
+    id: UUID
+    user_id: UUID
+    serial_number: str
+    model: str
+
+
+class DroneRegistry:
+    """In-process LRU cache of registered drones.
+
+    The drones API updates the registry on create/update/delete. Entries also
+    expire after ``ttl`` seconds so that changes made by other processes are
+    picked up, and unknown ids are remembered for ``negative_ttl`` seconds so
+    that telemetry from unregistered drones does not hit the database on every
+    message.
+    """
+
+    def __init__(self, max_size: int, ttl: float, negative_ttl: float):
+        """Initialize the registry."""
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._drones: "OrderedDict[UUID, Tuple[DroneInfo, float]]" = OrderedDict()
+        self._missing: Dict[UUID, float] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self):
+        """Warm the registry with up to ``max_size`` drones."""
+        db = SessionLocal()
+        try:
+            drones = (
+                db.query(Drone.id, Drone.user_id, Drone.serial_number, Drone.model)
+                .order_by(Drone.created_at.desc())
+                .limit(self.max_size)
+                .all()
+            )
+        finally:
+            db.close()
+
+        now = time.monotonic()
+        with self._lock:
+            self._drones.clear()
+            self._missing.clear()
+            for drone in drones:
+                self._drones[drone.id] = (DroneInfo(*drone), now)
+        logger.info(f"Loaded {len(drones)} drones into the drone registry")
+
+    def get(self, db: Session, drone_id: UUID) -> Optional[DroneInfo]:
+        """Get a drone by ID, falling back to the database on a miss."""
+        return self.get_many(db, [drone_id]).get(drone_id)
+
+    def peek(self, drone_id: UUID) -> Optional[DroneInfo]:
+        """Get a cached drone, expired or not, without touching the database."""
+        with self._lock:
+            entry = self._drones.get(drone_id)
+        return entry[0] if entry is not None else None
+
+    def get_many(self, db: Session, drone_ids: Iterable[UUID]) -> Dict[UUID, DroneInfo]:
+        """Get the registered drones among ``drone_ids`` with one query for misses."""
+        found = {}
+        missing = set()
+        now = time.monotonic()
+
+        with self._lock:
+            for drone_id in set(drone_ids):
+                entry = self._drones.get(drone_id)
+                if entry is not None and now - entry[1] < self.ttl:
+                    self._drones.move_to_end(drone_id)
+                    found[drone_id] = entry[0]
+                elif now - self._missing.get(drone_id, float("-inf")) >= self.negative_ttl:
+                    missing.add(drone_id)
+            self.hits += len(found)
+            self.misses += len(missing)
+
+        if not missing:
+            return found
+
+        drones = (
+            db.query(Drone.id, Drone.user_id, Drone.serial_number, Drone.model)
+            .filter(Drone.id.in_(missing))
+            .all()
+        )
+        with self._lock:
+            for drone in drones:
+                info = DroneInfo(*drone)
+                self._store(info, now)
+                found[info.id] = info
+                missing.discard(info.id)
+            for drone_id in missing:
+                self._missing[drone_id] = now
+            if len(self._missing) > self.max_size:
+                self._missing.clear()
+
+        return found
+
+    def put(self, drone: Drone):
+        """Add or refresh a drone after it was created or updated."""
+        info = DroneInfo(drone.id, drone.user_id, drone.serial_number, drone.model)
+        with self._lock:
+            self._store(info, time.monotonic())
+
+    def remove(self, drone_id: UUID):
+        """Forget a drone after it was deleted."""
+        with self._lock:
+            self._drones.pop(drone_id, None)
+
+    def _store(self, info: DroneInfo, loaded_at: float):
+        """Insert an entry and evict the least recently used ones (lock held)."""
+        self._drones[info.id] = (info, loaded_at)
+        self._drones.move_to_end(info.id)
+        self._missing.pop(info.id, None)
+        while len(self._drones) > self.max_size:
+            self._drones.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._drones)
+
+
+drone_registry = DroneRegistry(
+    max_size=settings.DRONE_REGISTRY_MAX_SIZE,
+    ttl=settings.DRONE_REGISTRY_TTL,
+    negative_ttl=settings.DRONE_REGISTRY_NEGATIVE_TTL,
+)
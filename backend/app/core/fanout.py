@@ -0,0 +1,279 @@
+import asyncio
+import logging
+import queue
+import threading
+import uuid
+from typing import Callable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+# (longitude, latitude) a message is about, used to route it to map viewports
+Position = Optional[Tuple[float, float]]
+
+# Called with (drone_id, position, encoded message) for every message from another process
+Handler = Callable[[str, Position, str], None]
+
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+NOTIFY_PAYLOAD_LIMIT = 7900
+
+
+class FanoutBus:
+    """Bus that forwards encoded live messages between processes.
+
+    Ingest processes publish ``(drone_id, encoded message)`` pairs and every
+    API worker hands the messages published by *other* processes to its own
+    WebSocket clients; a process delivers its own messages locally without a
+    round trip. Messages published during one loop iteration are sent
+    together, as lines of ``drone_id<TAB>lon<TAB>lat<TAB>message`` (empty
+    lon/lat without a position) after a first line with the sender id.
+
+    This base class is the single-process bus that forwards nothing.
+    """
+
+    # Whether published messages leave the process at all
+    forwarding = False
+    # Maximum payload size in bytes, None when unlimited
+    payload_limit: Optional[int] = None
+
+    def __init__(self, channel: str):
+        """Initialize the bus."""
+        self.channel = channel
+        self.sender_id = uuid.uuid4().hex
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.handler: Optional[Handler] = None
+        self._pending: List[Tuple[str, Position, str]] = []
+        self._flush_scheduled = False
+        self.published_messages = 0
+        self.received_messages = 0
+
+    async def start(self, handler: Optional[Handler] = None):
+        """Start publishing, and listening when a handler is given."""
+        self.loop = asyncio.get_running_loop()
+        self.handler = handler
+
+    async def stop(self):
+        """Flush pending messages and stop publishing."""
+        self._flush()
+        self.loop = None
+
+    def publish(self, drone_id: str, position: Position, message: str):
+        """Queue an encoded message for the other processes (event loop)."""
+        if self.loop is None or not self.forwarding:
+            return
+        self._pending.append((drone_id, position, message))
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.loop.call_soon(self._flush)
+
+    def _flush(self):
+        """Send the messages queued since the last flush."""
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, []
+        if pending:
+            self.published_messages += len(pending)
+            self._send(self._payloads(pending))
+
+    def _payloads(self, pending: List[Tuple[str, Position, str]]) -> List[str]:
+        """Pack messages into as few payloads as ``payload_limit`` allows."""
+        limit = self.payload_limit
+        header = self.sender_id
+        payloads = []
+        lines = [header]
+        size = len(header)
+        for drone_id, position, message in pending:
+            if position is None:
+                line = f"{drone_id}\t\t\t{message}"
+            else:
+                line = f"{drone_id}\t{position[0]!r}\t{position[1]!r}\t{message}"
+            if limit is not None and len(header) + 1 + len(line.encode()) > limit:
+                logger.warning(f"Live message for drone {drone_id} too large for the fan-out bus, skipped")
+                continue
+            if limit is not None and size + 1 + len(line.encode()) > limit:
+                payloads.append("\n".join(lines))
+                lines = [header]
+                size = len(header)
+            lines.append(line)
+            size += 1 + len(line.encode())
+        if len(lines) > 1:
+            payloads.append("\n".join(lines))
+        return payloads
+
+    def _send(self, payloads: List[str]):
+        """Send payloads to the other processes."""
+
+    def _receive(self, payload: str):
+        """Hand the messages of a payload from another process to the handler."""
+        sender_id, _, body = payload.partition("\n")
+        if sender_id == self.sender_id or self.handler is None or not body:
+            return
+        for line in body.split("\n"):
+            drone_id, longitude, latitude, message = line.split("\t", 3)
+            position = (float(longitude), float(latitude)) if longitude else None
+            self.received_messages += 1
+            self.handler(drone_id, position, message)
+
+
+class PostgresFanoutBus(FanoutBus):
+    """Fan-out over PostgreSQL LISTEN/NOTIFY.
+
+    Listens on a dedicated connection whose socket is watched by the event
+    loop, and sends NOTIFYs from another connection on a sender thread that
+    drains a FIFO queue, so payloads go out in the order they were flushed.
+    """
+
+    forwarding = True
+    payload_limit = NOTIFY_PAYLOAD_LIMIT
+
+    def __init__(self, channel: str):
+        """Initialize the bus."""
+        super().__init__(channel)
+        self._listener = None
+        self._notifier = None
+        # Payload lists to NOTIFY, None stops the sender
+        self._outbox: "queue.Queue[Optional[List[str]]]" = queue.Queue()
+        self._sender: Optional[threading.Thread] = None
+
+    async def start(self, handler: Optional[Handler] = None):
+        """Open the connections and LISTEN when a handler is given."""
+        await super().start(handler)
+        self._notifier = _dedicated_connection()
+        self._sender = threading.Thread(target=self._send_loop, name="fanout-notify", daemon=True)
+        self._sender.start()
+        if handler is not None:
+            self._listener = _dedicated_connection()
+            with self._listener.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+            self.loop.add_reader(self._listener.fileno(), self._on_readable)
+        logger.info(f"Live fan-out over PostgreSQL channel {self.channel}")
+
+    async def stop(self):
+        """Flush pending messages and close the connections."""
+        loop = self.loop
+        await super().stop()
+        if self._listener is not None:
+            loop.remove_reader(self._listener.fileno())
+            self._listener.close()
+            self._listener = None
+        if self._sender is not None:
+            # Let the sender finish the last flush and close its connection
+            self._outbox.put(None)
+            await loop.run_in_executor(None, self._sender.join)
+            self._sender = None
+
+    def _send(self, payloads: List[str]):
+        """Hand the payloads to the sender thread without blocking the event loop."""
+        self._outbox.put(payloads)
+
+    def _send_loop(self):
+        """NOTIFY queued payloads in order until stopped (sender thread)."""
+        while True:
+            payloads = self._outbox.get()
+            if payloads is None:
+                break
+            try:
+                with self._notifier.cursor() as cursor:
+                    for payload in payloads:
+                        cursor.execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+            except Exception as e:
+                logger.error(f"Error publishing live messages: {e}")
+        self._notifier.close()
+        self._notifier = None
+
+    def _on_readable(self):
+        """Drain notifications from the listener connection (event loop)."""
+        try:
+            self._listener.poll()
+        except Exception as e:
+            logger.error(f"Live fan-out listener failed: {e}")
+            self.loop.remove_reader(self._listener.fileno())
+            return
+        while self._listener.notifies:
+            self._receive(self._listener.notifies.pop(0).payload)
+
+
+class RedisFanoutBus(FanoutBus):
+    """Fan-out over Redis pub/sub, needs the optional ``redis`` package."""
+
+    forwarding = True
+
+    def __init__(self, channel: str, url: str):
+        """Initialize the bus."""
+        super().__init__(channel)
+        self.url = url
+        self._redis = None
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self, handler: Optional[Handler] = None):
+        """Connect and subscribe when a handler is given."""
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("FANOUT_BACKEND=redis requires the redis package (pip install redis)")
+
+        await super().start(handler)
+        self._redis = redis.from_url(self.url, decode_responses=True)
+        if handler is not None:
+            self._pubsub = self._redis.pubsub()
+            await self._pubsub.subscribe(self.channel)
+            self._listener = self.loop.create_task(self._listen())
+        logger.info(f"Live fan-out over Redis channel {self.channel}")
+
+    async def stop(self):
+        """Flush pending messages and disconnect."""
+        pending, self._pending = self._pending, []
+        if pending:
+            await self._publish(self._payloads(pending))
+        await super().stop()
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            await self._pubsub.close()
+        if self._redis is not None:
+            await self._redis.close()
+
+    def _send(self, payloads: List[str]):
+        """PUBLISH the payloads from a task."""
+        self.loop.create_task(self._publish(payloads))
+
+    async def _publish(self, payloads: List[str]):
+        """PUBLISH payloads on the channel."""
+        try:
+            for payload in payloads:
+                await self._redis.publish(self.channel, payload)
+        except Exception as e:
+            logger.error(f"Error publishing live messages: {e}")
+
+    async def _listen(self):
+        """Receive payloads until cancelled."""
+        async for message in self._pubsub.listen():
+            if message["type"] == "message":
+                self._receive(message["data"])
+
+
+def _dedicated_connection():
+    """Open an autocommit psycopg2 connection outside the engine's pool."""
+    connection = engine.raw_connection()
+    connection.detach()
+    dbapi_connection = connection.dbapi_connection
+    dbapi_connection.autocommit = True
+    return dbapi_connection
+
+
+def create_fanout_bus() -> FanoutBus:
+    """Create the bus selected by FANOUT_BACKEND (postgres, redis or local).
+
+    A lone API process that ingests itself defaults to local, there is no
+    other process to forward to.
+    """
+    if settings.FANOUT_BACKEND == "postgres":
+        return PostgresFanoutBus(settings.FANOUT_CHANNEL)
+    if settings.FANOUT_BACKEND == "redis":
+        return RedisFanoutBus(settings.FANOUT_CHANNEL, settings.REDIS_URL)
+    return FanoutBus(settings.FANOUT_CHANNEL)
+
+
+fanout_bus = create_fanout_bus()
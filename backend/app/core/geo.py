@@ -0,0 +1,91 @@
+import math
+from typing import Optional
+
+import numpy as np
+import shapely
+from shapely.geometry.base import BaseGeometry
+
+# Length of one degree of latitude (and of longitude at the equator)
+METERS_PER_DEGREE = 111320.0
+
+
+def local_scale(latitude: float) -> np.ndarray:
+    """Meters per degree of longitude and latitude around a latitude."""
+    return np.array([METERS_PER_DEGREE * math.cos(math.radians(latitude)), METERS_PER_DEGREE])
+
+
+def metric_buffer(geometry: BaseGeometry, distance: float) -> BaseGeometry:
+    """Buffer a WGS84 geometry by a distance in meters.
+
+    The geometry is projected to a local equirectangular plane centered on
+    its centroid, buffered there and projected back. At the scale of a
+    flight corridor this keeps the width accurate to well under a percent.
+    """
+    center = geometry.centroid
+    origin = np.array([center.x, center.y])
+    scale = local_scale(center.y)
+
+    local = shapely.transform(geometry, lambda coords: (coords - origin) * scale)
+    return shapely.transform(local.buffer(distance), lambda coords: coords / scale + origin)
+
+
+def metric_distance(geometry: BaseGeometry, longitude: float, latitude: float) -> float:
+    """Distance in meters from a point to a WGS84 geometry.
+
+    Both are projected to a local equirectangular plane centered on the
+    point, so east-west distances shrink with the latitude as they should.
+    """
+    origin = np.array([longitude, latitude])
+    scale = local_scale(latitude)
+    local = shapely.transform(geometry, lambda coords: (coords - origin) * scale)
+    return float(shapely.distance(local, shapely.Point(0.0, 0.0)))
+
+
+def meters_per_pixel(zoom: float, latitude: float) -> float:
+    """Ground size of a 256 px web map tile pixel at a zoom level and latitude."""
+    return 2 * math.pi * 6378137.0 * math.cos(math.radians(latitude)) / (256 * 2 ** zoom)
+
+
+def simplify_track(coords: np.ndarray, tolerance: float, keep: Optional[np.ndarray] = None) -> np.ndarray:
+    """Douglas-Peucker simplification of a WGS84 track, as a mask of kept points.
+
+    ``coords`` is an (n, 2) array of longitude/latitude and ``tolerance`` a
+    distance in meters, measured in a local plane around the track. Points
+    in ``keep`` (indices) are always kept, and the track is simplified
+    between them. Each split finds the farthest point of a stretch with one
+    vectorized distance computation.
+    """
+    count = len(coords)
+    mask = np.zeros(count, dtype=bool)
+    if count == 0:
+        return mask
+
+    points = (coords - coords.mean(axis=0)) * local_scale(float(coords[:, 1].mean()))
+    anchors = {0, count - 1}
+    if keep is not None:
+        anchors.update(int(index) for index in keep)
+    anchors = sorted(anchors)
+    mask[anchors] = True
+
+    stack = list(zip(anchors[:-1], anchors[1:]))
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start, end = points[first], points[last]
+        inner = points[first + 1:last]
+        segment = end - start
+        length = float(segment @ segment)
+        if length == 0:
+            distances = np.hypot(*(inner - start).T)
+        else:
+            # Distance to the segment, not the infinite line, for tracks that turn back
+            t = np.clip((inner - start) @ segment / length, 0, 1)
+            distances = np.hypot(*(inner - (start + t[:, None] * segment)).T)
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            index = first + 1 + farthest
+            mask[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return mask
@@ -0,0 +1,95 @@
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Tuple
+
+import orjson
+from sqlalchemy import func
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.db.telemetry_writer import TelemetryRow, telemetry_message
+from app.models.telemetry import DroneTelemetry
+
+logger = logging.getLogger(__name__)
+
+
+class LastKnown(NamedTuple):
+    """Last live telemetry message of a drone."""
+    drone_id: str
+    position: Tuple[float, float]
+    message: str
+    updated: float
+
+
+class LastKnownStore:
+    """In-memory last known state of every drone, sent as a snapshot on subscribe.
+
+    The WebSocket layer records every live telemetry message it delivers,
+    already encoded, so a snapshot is a join of stored messages. Drones not
+    heard from for ``max_age`` seconds are left out of snapshots.
+    """
+
+    def __init__(self, max_age: float):
+        """Initialize the store."""
+        self.max_age = max_age
+        self._drones: Dict[str, LastKnown] = {}
+
+    def load(self):
+        """Warm the store with the latest stored telemetry of recently seen drones."""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.max_age)
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(
+                    DroneTelemetry.drone_id,
+                    func.ST_X(DroneTelemetry.location),
+                    func.ST_Y(DroneTelemetry.location),
+                    DroneTelemetry.altitude,
+                    DroneTelemetry.speed,
+                    DroneTelemetry.heading,
+                    DroneTelemetry.battery_level,
+                    DroneTelemetry.status,
+                    DroneTelemetry.timestamp,
+                )
+                .filter(DroneTelemetry.timestamp >= cutoff)
+                .distinct(DroneTelemetry.drone_id)
+                .order_by(DroneTelemetry.drone_id, DroneTelemetry.timestamp.desc())
+                .all()
+            )
+        finally:
+            db.close()
+
+        self._drones.clear()
+        for row in rows:
+            row = TelemetryRow(*row)
+            drone_id = str(row.drone_id)
+            message = orjson.dumps({
+                "type": "telemetry",
+                "drone_id": drone_id,
+                "data": telemetry_message(row),
+                "timestamp": row.timestamp.isoformat(),
+            }).decode()
+            self._drones[drone_id] = LastKnown(
+                drone_id, (row.longitude, row.latitude), message, row.timestamp.timestamp()
+            )
+        logger.info(f"Loaded the last known position of {len(rows)} drones")
+
+    def update(self, drone_id: str, position: Tuple[float, float], message: str):
+        """Record the newest encoded telemetry message of a drone (event loop)."""
+        self._drones[drone_id] = LastKnown(drone_id, position, message, time.time())
+
+    def remove(self, drone_id: str):
+        """Forget a drone."""
+        self._drones.pop(drone_id, None)
+
+    def recent(self) -> List[LastKnown]:
+        """Get the drones heard from within ``max_age`` seconds."""
+        cutoff = time.time() - self.max_age
+        return [entry for entry in self._drones.values() if entry.updated >= cutoff]
+
+    def __len__(self) -> int:
+        return len(self._drones)
+
+
+last_known = LastKnownStore(max_age=settings.WS_SNAPSHOT_MAX_AGE)
@@ -1,161 +1,443 @@
 import json
 import logging
-from typing import Callable, Dict, Any, Optional
+import math
+import os
+import socket
+import struct
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
+from uuid import UUID
 import asyncio
 
 import paho.mqtt.client as mqtt
-from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.drone_registry import drone_registry
+from app.core.telemetry_frame import BINARY_TOPIC_SUFFIX, decode_frame
+from app.core.telemetry_history import TelemetryHistory, telemetry_history
+from app.core.telemetry_store import store_telemetry
 from app.db.session import SessionLocal
-from app.models.telemetry import DroneTelemetry
-from app.models.drone import Drone
-from app.models.flight_request import FlightRequest, FlightStatus
-from app.models.violation import Violation, ViolationType
-from app.ws.telemetry_ws import broadcast_telemetry
-from geoalchemy2.shape import from_shape
-from shapely.geometry import Point, LineString, mapping
-import shapely.wkb
+from app.db.telemetry_writer import TelemetryRow, telemetry_message
+from app.ws.telemetry_ws import broadcast_telemetry, broadcast_violation
 
 logger = logging.getLogger(__name__)
 
+# Weight of each new sample in the smoothed latency gauges
+LATENCY_SMOOTHING = 0.05
+
+
+def _finite(value: Any) -> float:
+    """Coerce a telemetry number to float, rejecting null, booleans, NaN and infinities."""
+    if value is None or isinstance(value, bool):
+        raise ValueError(f"{value!r} is not a number")
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{value!r} is not a finite number")
+    return number
+
+
+def _optional_finite(value: Any) -> Optional[float]:
+    """Like ``_finite`` for fields that may be absent."""
+    return None if value is None else _finite(value)
+
+
+def _is_row_error(error: Exception) -> bool:
+    """Whether a failed write may be down to its rows, rather than to the database being unreachable."""
+    return not any(cls.__name__ in ("OperationalError", "InterfaceError") for cls in type(error).__mro__)
+
+
+def shard_for_drone(drone_id: str, shard_count: int) -> int:
+    """Stable shard of a drone id, identical across processes."""
+    return zlib.crc32(drone_id.encode()) % shard_count
+
 
 class MQTTClient:
-    """MQTT client for processing telemetry data."""
-    
-    def __init__(self):
+    """MQTT client for processing telemetry data.
+
+    Live positions and history rows take separate paths. The newest message
+    of each drone is kept in a latest-wins map that is broadcast every
+    LIVE_PUBLISH_INTERVAL seconds, independently of the database, so a slow
+    Postgres never delays the live map. History rows go through the bounded
+    ingest queue; once it is filled above INGEST_HIGH_WATER only one row per
+    drone every INGEST_SAMPLE_INTERVAL seconds is admitted, and rows are
+    dropped when it is full.
+
+    The ingest tasks run on the event loop that calls ``start`` (FastAPI's
+    in the API), the same loop that serves the WebSocket clients. Paho's
+    network thread only decodes messages and schedules them onto that loop.
+
+    With ``shard_count`` > 1 the client is one of several ingest workers:
+    in "shared" mode the workers join an MQTT shared subscription group and
+    the broker spreads messages between them, in "hash" mode every worker
+    subscribes to all telemetry and keeps only the drones whose id hashes to
+    its ``shard_index``, so that each drone always lands on the same worker.
+    """
+
+    def __init__(
+        self,
+        shard_index: int = 0,
+        shard_count: int = 1,
+        shard_mode: str = "hash",
+        history: Optional[TelemetryHistory] = telemetry_history,
+    ):
         """Initialize MQTT client."""
-        self.client = mqtt.Client(client_id=settings.MQTT_CLIENT_ID)
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        self.shard_mode = shard_mode
+        # Recent history fed with the stored rows, None when nothing in the process serves it
+        self.history = history
+
+        # Unique per process, the broker disconnects a client whose id is reused
+        client_id = f"{settings.MQTT_CLIENT_ID}-{socket.gethostname()}-{os.getpid()}"
+        if shard_count > 1:
+            client_id = f"{client_id}-{shard_index}"
+        self.client = mqtt.Client(client_id=client_id)
         self.client.on_connect = self.on_connect
         self.client.on_message = self.on_message
-    
+
+        # Ingest pipeline: paho thread -> bounded queue -> batch worker
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._publisher: Optional[asyncio.Task] = None
+        # Newest unpublished row with its receive time, and last admitted sample per drone
+        self._latest: Dict[UUID, Tuple[TelemetryRow, float]] = {}
+        self._last_sampled: Dict[UUID, float] = {}
+
+        # Counters for throughput reporting
+        self.received_messages = 0
+        self.skipped_messages = 0
+        self.dropped_messages = 0
+        self.coalesced_messages = 0
+        self.sampled_out_messages = 0
+        self.stored_messages = 0
+
+        # Smoothed latencies in seconds, from receipt and from the drone's
+        # own timestamp (which assumes synchronized clocks) to broadcast
+        self.live_latency = 0.0
+        self.source_latency = 0.0
+
+    @property
+    def subscription_topics(self) -> List[str]:
+        """Topic filters this client subscribes to, JSON and binary telemetry."""
+        topics = [settings.MQTT_TELEMETRY_TOPIC, settings.MQTT_TELEMETRY_TOPIC + BINARY_TOPIC_SUFFIX]
+        if self.shard_count > 1 and self.shard_mode == "shared":
+            return [f"$share/{settings.INGEST_SHARE_GROUP}/{topic}" for topic in topics]
+        return topics
+
+    def owns_topic(self, topic: str) -> bool:
+        """Whether a telemetry topic (drones/<drone_id>/telemetry[/bin]) belongs to this shard."""
+        if self.shard_count <= 1 or self.shard_mode != "hash":
+            return True
+        parts = topic.split("/")
+        if len(parts) < 3:
+            return False
+        return shard_for_drone(parts[1], self.shard_count) == self.shard_index
+
     def connect(self):
         """Connect to MQTT broker."""
         self.client.connect(settings.MQTT_BROKER_HOST, settings.MQTT_BROKER_PORT, 60)
         logger.info(f"Connected to MQTT broker at {settings.MQTT_BROKER_HOST}:{settings.MQTT_BROKER_PORT}")
-    
+
     def on_connect(self, client, userdata, flags, rc):
         """Callback for when the client connects to the broker."""
         logger.info(f"Connected with result code {rc}")
-        
-        client.subscribe(settings.MQTT_TELEMETRY_TOPIC)
-        logger.info(f"Subscribed to {settings.MQTT_TELEMETRY_TOPIC}")
-    
+
+        client.subscribe([(topic, 0) for topic in self.subscription_topics])
+        logger.info(f"Subscribed to {', '.join(self.subscription_topics)}")
+
     def on_message(self, client, userdata, msg):
-        """Callback for when a message is received from the broker."""
-        try:
-            
-            payload = json.loads(msg.payload.decode())
-            logger.debug(f"Received message: {payload}")
-            
-            
-            asyncio.run(self.process_telemetry(payload))
-        except Exception as e:
-            logger.error(f"Error processing message: {e}")
-    
-    async def process_telemetry(self, telemetry: Dict[str, Any]):
-        """Process and store telemetry data."""
-        db = SessionLocal()
+        """Callback for when a message is received from the broker.
+
+        Runs on the paho network thread, so it only decodes the payload into
+        a telemetry row and hands it over to the ingest loop. Messages on the
+        binary topic are fixed-layout frames, the others are JSON.
+        """
+        if not self.owns_topic(msg.topic):
+            self.skipped_messages += 1
+            return
+
+        received = time.monotonic()
+        self.received_messages += 1
         try:
-            
-            drone_id = telemetry.get("drone_id")
-            if not drone_id:
-                logger.error("Telemetry missing drone_id")
-                return
-            
-            
-            drone = db.query(Drone).filter(Drone.id == drone_id).first()
-            if not drone:
-                logger.error(f"Drone with ID {drone_id} not found")
-                return
-            
-            
-            location_data = telemetry.get("location", {})
-            coordinates = location_data.get("coordinates", [])
-            if not coordinates or len(coordinates) < 2:
-                logger.error("Invalid location coordinates")
+            if msg.topic.endswith(BINARY_TOPIC_SUFFIX):
+                row = TelemetryRow._make(decode_frame(msg.payload))
+            else:
+                row = self._parse_telemetry(json.loads(msg.payload))
+        except (ValueError, TypeError, AttributeError, OverflowError, OSError, struct.error) as e:
+            # Raising here would stop paho's network thread, and ingest with it
+            self.skipped_messages += 1
+            logger.error(f"Error decoding message: {e}")
+            return
+
+        if row is None:
+            self.skipped_messages += 1
+            return
+
+        if self.loop is None:
+            logger.warning("Ingest loop is not running, dropping message")
+            return
+
+        self.loop.call_soon_threadsafe(self._enqueue, row, received)
+
+    def _enqueue(self, row: TelemetryRow, received: float):
+        """Hand a decoded row to the live and history paths (runs on the ingest loop).
+
+        Only drones in the registry go live. Others reach the database path,
+        which looks them up and drops the rows of unregistered ones; once a
+        drone is found there, its next messages go live too.
+        """
+        if drone_registry.peek(row.drone_id) is not None:
+            if row.drone_id in self._latest:
+                self.coalesced_messages += 1
+            self._latest[row.drone_id] = (row, received)
+
+        if self.queue.qsize() >= settings.INGEST_HIGH_WATER * self.queue.maxsize:
+            now = self.loop.time()
+            if now - self._last_sampled.get(row.drone_id, float("-inf")) < settings.INGEST_SAMPLE_INTERVAL:
+                self.sampled_out_messages += 1
                 return
-            
-            
-            point = Point(coordinates[0], coordinates[1])
-            wkb_point = from_shape(point, srid=4326)
-            
-            
-            db_telemetry = DroneTelemetry(
-                drone_id=drone_id,
-                location=wkb_point,
-                altitude=telemetry.get("altitude", 0.0),
-                speed=telemetry.get("speed"),
-                heading=telemetry.get("heading"),
-                battery_level=telemetry.get("battery_level"),
-                status=telemetry.get("status"),
-            )
-            db.add(db_telemetry)
-            
-            
-            flight_request = (
-                db.query(FlightRequest)
-                .filter(
-                    FlightRequest.drone_id == drone_id,
-                    FlightRequest.status.in_([FlightStatus.APPROVED, FlightStatus.IN_PROGRESS]),
-                )
-                .order_by(FlightRequest.start_time.desc())
-                .first()
+            self._last_sampled[row.drone_id] = now
+
+        try:
+            self.queue.put_nowait(row)
+        except asyncio.QueueFull:
+            self.dropped_messages += 1
+            if self.dropped_messages % 1000 == 1:
+                logger.warning(f"Ingest queue full, dropped {self.dropped_messages} messages so far")
+
+    async def _live_publisher(self):
+        """Broadcast the newest position of each drone at a fixed rate until cancelled."""
+        while True:
+            await asyncio.sleep(settings.LIVE_PUBLISH_INTERVAL)
+            if not self._latest:
+                # Nothing pending, also a good moment to forget old samples
+                self._last_sampled.clear()
+                continue
+
+            latest, self._latest = self._latest, {}
+            for drone_id, (row, _) in latest.items():
+                try:
+                    await broadcast_telemetry(str(drone_id), telemetry_message(row))
+                except Exception as e:
+                    logger.error(f"Error broadcasting telemetry: {e}")
+
+            self._record_latency(latest.values())
+
+    def _record_latency(self, published):
+        """Fold the latencies of a published round into the smoothed gauges."""
+        now = time.monotonic()
+        wall_now = datetime.now(timezone.utc)
+        for row, received in published:
+            self.live_latency += LATENCY_SMOOTHING * (now - received - self.live_latency)
+            self.source_latency += LATENCY_SMOOTHING * (
+                (wall_now - row.timestamp).total_seconds() - self.source_latency
             )
-            
-            
-            violations = []
-            if flight_request:
-                
-                path = flight_request.path
-                path_shape = shapely.wkb.loads(bytes(path.data))
-                
-                
-                buffer_distance = 0.001 
-                if not path_shape.buffer(buffer_distance).contains(point):
-                    
-                    violation = Violation(
-                        drone_id=drone_id,
-                        flight_request_id=flight_request.id,
-                        type=ViolationType.OUT_OF_PATH,
-                        location=wkb_point,
-                        description="Drone has deviated from approved flight path",
-                    )
-                    db.add(violation)
-                    violations.append(mapping(violation))
-            
-            
-            db.commit()
-            
-            
-            telemetry_data = {
-                "type": "telemetry",
-                "data": telemetry,
-            }
-            await broadcast_telemetry(telemetry_data)
-            
-            if violations:
-                violation_data = {
-                    "type": "violation",
-                    "data": violations,
-                }
-                await broadcast_telemetry(violation_data)
-            
+
+    def stats(self) -> Dict[str, Any]:
+        """Ingest counters and latencies for monitoring."""
+        return {
+            "received_messages": self.received_messages,
+            "skipped_messages": self.skipped_messages,
+            "coalesced_messages": self.coalesced_messages,
+            "sampled_out_messages": self.sampled_out_messages,
+            "dropped_messages": self.dropped_messages,
+            "stored_messages": self.stored_messages,
+            "queue_size": self.queue.qsize() if self.queue is not None else 0,
+            "live_latency_ms": round(self.live_latency * 1000, 2),
+            "source_latency_ms": round(self.source_latency * 1000, 2),
+        }
+
+    async def _ingest_worker(self):
+        """Drain the ingest queue in micro-batches until cancelled."""
+        try:
+            while True:
+                batch = await self._next_batch()
+                await self.process_batch(batch)
+        except asyncio.CancelledError:
+            # Flush whatever is still queued before shutting down
+            batch = self._drain(settings.INGEST_QUEUE_SIZE)
+            if batch:
+                await self.process_batch(batch)
+            raise
+
+    async def _next_batch(self) -> List[TelemetryRow]:
+        """Wait for the next batch, closed by size or by the batch interval."""
+        batch = [await self.queue.get()]
+        deadline = self.loop.time() + settings.INGEST_BATCH_INTERVAL
+
+        while len(batch) < settings.INGEST_BATCH_SIZE:
+            batch.extend(self._drain(settings.INGEST_BATCH_SIZE - len(batch)))
+            if len(batch) >= settings.INGEST_BATCH_SIZE:
+                break
+
+            timeout = deadline - self.loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    def _drain(self, limit: int) -> List[TelemetryRow]:
+        """Take up to ``limit`` already queued messages without waiting."""
+        items = []
+        while len(items) < limit:
+            try:
+                items.append(self.queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return items
+
+    async def process_batch(self, batch: List[TelemetryRow]):
+        """Store a batch of telemetry in one transaction and broadcast its violations."""
+        try:
+            # Database work is blocking, keep it off the ingest loop
+            stored, violations = await self.loop.run_in_executor(None, self.store_batch, batch)
+        except Exception as e:
+            logger.error(f"Error processing telemetry batch: {e}")
+            return
+
+        self.stored_messages += stored
+        for drone_id, violation in violations:
+            await broadcast_violation(drone_id, violation)
+
+    def store_batch(self, batch: List[TelemetryRow]) -> Tuple[int, List[Tuple[str, Dict[str, Any]]]]:
+        """Check and insert a batch of telemetry rows from registered drones.
+
+        A batch the database rejects is split in halves that are stored
+        separately, so a bad row only loses itself and not its batch. Errors
+        of an unavailable database are raised as they are.
+
+        Returns the number of stored rows and the violation events.
+        """
+        try:
+            return self._store(batch)
         except Exception as e:
-            logger.error(f"Error processing telemetry: {e}")
+            if not _is_row_error(e):
+                raise
+            if len(batch) == 1:
+                logger.error(f"Dropping telemetry row of drone {batch[0].drone_id}: {e}")
+                return 0, []
+
+        middle = len(batch) // 2
+        stored, violations = self.store_batch(batch[:middle])
+        more_stored, more_violations = self.store_batch(batch[middle:])
+        return stored + more_stored, violations + more_violations
+
+    def _store(self, batch: List[TelemetryRow]) -> Tuple[int, List[Tuple[str, Dict[str, Any]]]]:
+        """Check and insert telemetry rows in one transaction."""
+        db = SessionLocal()
+        try:
+            known_drones = drone_registry.get_many(db, {row.drone_id for row in batch})
+
+            rows = []
+            for row in batch:
+                if row.drone_id not in known_drones:
+                    logger.error(f"Drone with ID {row.drone_id} not found")
+                    continue
+                rows.append(row)
+
+            if not rows:
+                return 0, []
+
+            return len(rows), store_telemetry(db, rows, self.history)
+        except Exception:
             db.rollback()
+            raise
         finally:
             db.close()
-    
-    def start(self):
-        """Start the MQTT client."""
+
+    def _parse_telemetry(self, telemetry: Any) -> Optional[TelemetryRow]:
+        """Build a telemetry row from a JSON telemetry message."""
+        if not isinstance(telemetry, dict):
+            logger.error("Telemetry message is not an object")
+            return None
+
+        drone_id = telemetry.get("drone_id")
+        if not drone_id:
+            logger.error("Telemetry missing drone_id")
+            return None
+
+        try:
+            drone_id = UUID(str(drone_id))
+        except ValueError:
+            logger.error(f"Invalid drone_id {drone_id}")
+            return None
+
+        location_data = telemetry.get("location") or {}
+        coordinates = location_data.get("coordinates") if isinstance(location_data, dict) else None
+        if not isinstance(coordinates, (list, tuple)) or len(coordinates) < 2:
+            logger.error("Invalid location coordinates")
+            return None
+
+        try:
+            longitude = _finite(coordinates[0])
+            latitude = _finite(coordinates[1])
+            altitude = _finite(telemetry.get("altitude", 0.0))
+            speed = _optional_finite(telemetry.get("speed"))
+            heading = _optional_finite(telemetry.get("heading"))
+            battery_level = _optional_finite(telemetry.get("battery_level"))
+        except (TypeError, ValueError) as e:
+            logger.error(f"Invalid telemetry values: {e}")
+            return None
+        if not (-180.0 <= longitude <= 180.0 and -90.0 <= latitude <= 90.0):
+            logger.error(f"Invalid location coordinates {longitude}, {latitude}")
+            return None
+
+        status = telemetry.get("status")
+        if status is not None and not isinstance(status, str):
+            logger.error(f"Invalid telemetry status {status!r}")
+            return None
+
+        # Rows of one batch share a transaction, so the server-side now()
+        # default would give them all the same timestamp
+        timestamp = datetime.now(timezone.utc)
+        if telemetry.get("timestamp"):
+            try:
+                timestamp = datetime.fromisoformat(telemetry["timestamp"])
+                if timestamp.tzinfo is None:
+                    timestamp = timestamp.replace(tzinfo=timezone.utc)
+            except (TypeError, ValueError):
+                logger.warning(f"Invalid telemetry timestamp {telemetry['timestamp']}")
+
+        return TelemetryRow(
+            drone_id=drone_id,
+            longitude=longitude,
+            latitude=latitude,
+            altitude=altitude,
+            speed=speed,
+            heading=heading,
+            battery_level=battery_level,
+            status=status,
+            timestamp=timestamp,
+        )
+
+    async def start(self):
+        """Start the ingest tasks on the running event loop and the MQTT network thread."""
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=settings.INGEST_QUEUE_SIZE)
+        self._worker = self.loop.create_task(self._ingest_worker())
+        self._publisher = self.loop.create_task(self._live_publisher())
+
         self.client.loop_start()
-    
-    def stop(self):
-        """Stop the MQTT client."""
+
+    async def stop(self):
+        """Stop the MQTT client and flush the ingest queue."""
         self.client.loop_stop()
         self.client.disconnect()
 
+        if self._worker is not None:
+            self._publisher.cancel()
+            self._worker.cancel()
+            await asyncio.gather(self._publisher, self._worker, return_exceptions=True)
+            self._worker = None
+            self._publisher = None
+            self.loop = None
 
 
-mqtt_client = MQTTClient() 
\ No newline at end of file
+mqtt_client = MQTTClient()
@@ -0,0 +1,65 @@
+from typing import AbstractSet, Dict, Hashable, Set, Tuple
+
+# Topic of every drone
+ALL_DRONES: Tuple[str] = ("drones",)
+
+
+def user_drones(user_id: str) -> Tuple[str, str]:
+    """Topic of the drones owned by a user."""
+    return ("user", user_id)
+
+
+class SubscriptionRegistry:
+    """Topic to subscribers map with set membership.
+
+    A reverse index from each subscriber to its topics makes unsubscribing
+    everything cost O(subscriptions) instead of a scan of every topic.
+    """
+
+    def __init__(self):
+        """Initialize the registry."""
+        self._subscribers: Dict[Hashable, Set[Hashable]] = {}
+        self._topics: Dict[Hashable, Set[Hashable]] = {}
+
+    def subscribe(self, subscriber: Hashable, topic: Hashable):
+        """Add a subscriber to a topic."""
+        self._subscribers.setdefault(topic, set()).add(subscriber)
+        self._topics.setdefault(subscriber, set()).add(topic)
+
+    def unsubscribe(self, subscriber: Hashable, topic: Hashable):
+        """Remove a subscriber from a topic."""
+        subscribers = self._subscribers.get(topic)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[topic]
+
+        topics = self._topics.get(subscriber)
+        if topics is not None:
+            topics.discard(topic)
+            if not topics:
+                del self._topics[subscriber]
+
+    def unsubscribe_all(self, subscriber: Hashable) -> Set[Hashable]:
+        """Remove a subscriber from all its topics and return them."""
+        topics = self._topics.pop(subscriber, set())
+        for topic in topics:
+            subscribers = self._subscribers[topic]
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[topic]
+        return topics
+
+    def subscribers(self, topic: Hashable) -> AbstractSet[Hashable]:
+        """Get the subscribers of a topic (do not modify)."""
+        return self._subscribers.get(topic, frozenset())
+
+    def topics(self, subscriber: Hashable) -> AbstractSet[Hashable]:
+        """Get the topics of a subscriber (do not modify)."""
+        return self._topics.get(subscriber, frozenset())
+
+    def __contains__(self, topic: Hashable) -> bool:
+        return topic in self._subscribers
+
+    def __len__(self) -> int:
+        return len(self._topics)
@@ -0,0 +1,103 @@
+"""
+Compact binary telemetry frame, published on ``drones/<drone_id>/telemetry/bin``
+next to the JSON format on ``drones/<drone_id>/telemetry``.
+
+Fixed little-endian layout, 58 bytes per message:
+
+    offset  size  field
+         0     1  version (1)
+         1    16  drone id (UUID bytes)
+        17     8  timestamp, float64 seconds since the Unix epoch
+        25     8  longitude, float64
+        33     8  latitude, float64
+        41     4  altitude, float32 meters
+        45     4  speed, float32 m/s (NaN when unknown)
+        49     4  heading, float32 degrees (NaN when unknown)
+        53     4  battery level, float32 percent (NaN when unknown)
+        57     1  status code, index into STATUS_CODES (0 when unknown)
+
+Only depends on the standard library so that simulators and devices can
+import it without the backend's dependencies.
+"""
+
+import math
+import struct
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+from uuid import UUID
+
+FRAME_VERSION = 1
+BINARY_TOPIC_SUFFIX = "/bin"
+
+FRAME = struct.Struct("<B16sdddffffB")
+
+# Status strings that fit in the frame, unknown ones travel as code 0
+STATUS_CODES = (None, "idle", "flying", "landing", "landed", "returning", "emergency", "charging")
+_STATUS_INDEX = {status: code for code, status in enumerate(STATUS_CODES)}
+
+_NAN = float("nan")
+
+
+def encode_frame(
+    drone_id: UUID,
+    longitude: float,
+    latitude: float,
+    altitude: float,
+    speed: Optional[float],
+    heading: Optional[float],
+    battery_level: Optional[float],
+    status: Optional[str],
+    timestamp: datetime,
+) -> bytes:
+    """Pack one telemetry message into a binary frame."""
+    return FRAME.pack(
+        FRAME_VERSION,
+        drone_id.bytes,
+        timestamp.timestamp(),
+        longitude,
+        latitude,
+        altitude,
+        _NAN if speed is None else speed,
+        _NAN if heading is None else heading,
+        _NAN if battery_level is None else battery_level,
+        _STATUS_INDEX.get(status, 0),
+    )
+
+
+def decode_frame(payload: bytes) -> Tuple[
+    UUID, float, float, float, Optional[float], Optional[float], Optional[float], Optional[str], datetime
+]:
+    """Unpack a binary frame.
+
+    Returns the fields in ``TelemetryRow`` order. Raises ``ValueError`` on
+    frames of the wrong size or version and on out-of-range values.
+    """
+    if len(payload) != FRAME.size:
+        raise ValueError(f"Telemetry frame must be {FRAME.size} bytes, got {len(payload)}")
+
+    (
+        version, drone_id, timestamp, longitude, latitude,
+        altitude, speed, heading, battery_level, status,
+    ) = FRAME.unpack(payload)
+    if version != FRAME_VERSION:
+        raise ValueError(f"Unsupported telemetry frame version {version}")
+    if not (-180.0 <= longitude <= 180.0 and -90.0 <= latitude <= 90.0):
+        raise ValueError(f"Invalid telemetry coordinates {longitude}, {latitude}")
+    if not math.isfinite(altitude):
+        raise ValueError(f"Invalid telemetry altitude {altitude}")
+    try:
+        moment = datetime.fromtimestamp(timestamp, timezone.utc)
+    except (OverflowError, OSError, ValueError):
+        raise ValueError(f"Invalid telemetry timestamp {timestamp}")
+
+    return (
+        UUID(bytes=drone_id),
+        longitude,
+        latitude,
+        altitude,
+        None if math.isnan(speed) else speed,
+        None if math.isnan(heading) else heading,
+        None if math.isnan(battery_level) else battery_level,
+        STATUS_CODES[status] if status < len(STATUS_CODES) else None,
+        moment,
+    )
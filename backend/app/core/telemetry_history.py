@@ -0,0 +1,220 @@
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import UUID
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.telemetry_frame import STATUS_CODES
+from app.db.telemetry_writer import TelemetryRow
+
+logger = logging.getLogger(__name__)
+
+POINT_DTYPE = np.dtype([
+    ("timestamp", "f8"),  # seconds since the Unix epoch
+    ("longitude", "f8"),
+    ("latitude", "f8"),
+    ("altitude", "f4"),
+    ("speed", "f4"),  # NaN when unknown
+    ("heading", "f4"),
+    ("battery_level", "f4"),
+    ("status", "u1"),  # index into the store's status table
+])
+
+# Most distinct statuses a u1 status code can hold
+MAX_STATUSES = 256
+
+
+class _Ring:
+    """Fixed-size ring of the latest points of one drone."""
+
+    __slots__ = ("points", "start", "count", "since")
+
+    def __init__(self, size: int, since: float):
+        self.points = np.zeros(size, dtype=POINT_DTYPE)
+        self.start = 0
+        self.count = 0
+        # Every stored point of the drone from this time on is in the ring
+        self.since = since
+
+
+class TelemetryHistory:
+    """Recent telemetry of each drone, in NumPy ring buffers.
+
+    Rows are added once they are committed to ``drone_telemetry``, so from
+    the first row a process stores for a drone, the ring holds everything
+    the database has for that drone until points are overwritten, provided
+    no other process writes telemetry. The shared instance is disabled
+    unless ``TELEMETRY_SINGLE_WRITER`` says so. Queries
+    answer from memory only when the requested range is known to be
+    complete, and return None otherwise so that callers fall back to the
+    database.
+
+    Each drone takes ``size`` points of ``POINT_DTYPE``, and at most
+    ``max_drones`` drones are kept (least recently updated first out).
+    Points older than ``window`` seconds are not served from memory.
+    """
+
+    def __init__(self, size: int, window: float, max_drones: int):
+        """Initialize the history."""
+        self.size = size
+        self.window = window
+        self.max_drones = max_drones
+        self._rings: "OrderedDict[UUID, _Ring]" = OrderedDict()
+        self._statuses: List[Optional[str]] = list(STATUS_CODES)
+        self._status_codes: Dict[Optional[str], int] = {s: code for code, s in enumerate(STATUS_CODES)}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the history keeps anything at all."""
+        return self.size > 0 and self.max_drones > 0
+
+    def extend(self, rows: Iterable[TelemetryRow]):
+        """Add rows committed to the database, from any thread."""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            for row in rows:
+                timestamp = row.timestamp.timestamp()
+                ring = self._rings.get(row.drone_id)
+                if ring is None:
+                    ring = self._rings[row.drone_id] = _Ring(self.size, timestamp)
+                    if len(self._rings) > self.max_drones:
+                        self._rings.popitem(last=False)
+                else:
+                    self._rings.move_to_end(row.drone_id)
+
+                status = self._status_code(row.status)
+                if status is None:
+                    # The status cannot be kept, start over after this row
+                    ring.start = ring.count = 0
+                    ring.since = math.nextafter(timestamp, math.inf)
+                    continue
+
+                if ring.count < self.size:
+                    index = (ring.start + ring.count) % self.size
+                    ring.count += 1
+                else:
+                    index = ring.start
+                    ring.start = (ring.start + 1) % self.size
+                    # The overwritten point and anything older are gone
+                    ring.since = max(ring.since, math.nextafter(float(ring.points[index]["timestamp"]), math.inf))
+
+                ring.points[index] = (
+                    timestamp,
+                    row.longitude,
+                    row.latitude,
+                    row.altitude,
+                    math.nan if row.speed is None else row.speed,
+                    math.nan if row.heading is None else row.heading,
+                    math.nan if row.battery_level is None else row.battery_level,
+                    status,
+                )
+
+    def _status_code(self, status: Optional[str]) -> Optional[int]:
+        """Code of a status, registering new ones while there is room (under the lock)."""
+        code = self._status_codes.get(status)
+        if code is None and len(self._statuses) < MAX_STATUSES:
+            code = self._status_codes[status] = len(self._statuses)
+            self._statuses.append(status)
+        return code
+
+    def remove(self, drone_id: UUID):
+        """Forget a drone."""
+        with self._lock:
+            self._rings.pop(drone_id, None)
+
+    def query(
+        self,
+        drone_id: UUID,
+        limit: int,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Get the newest ``limit`` points in a time range, oldest first.
+
+        Returns None when the history cannot tell the range is complete.
+        """
+        with self._lock:
+            ring = self._rings.get(drone_id)
+            if ring is None or limit <= 0:
+                points = None
+            else:
+                points = np.roll(ring.points, -ring.start)[:ring.count]
+                since = max(ring.since, time.time() - self.window)
+            statuses = self._statuses
+
+        if points is None:
+            self.misses += 1
+            return None
+
+        selected = points["timestamp"] >= since
+        if end_time is not None:
+            selected &= points["timestamp"] <= end_time.timestamp()
+        if start_time is not None:
+            if start_time.timestamp() < since:
+                self.misses += 1
+                return None
+            selected &= points["timestamp"] >= start_time.timestamp()
+        points = points[selected]
+
+        # Without a start the newest points must not continue in the database
+        if start_time is None and len(points) < limit:
+            self.misses += 1
+            return None
+
+        points = points[np.argsort(points["timestamp"], kind="stable")[-limit:]]
+        self.hits += 1
+        return [
+            {
+                "drone_id": drone_id,
+                "latitude": float(point["latitude"]),
+                "longitude": float(point["longitude"]),
+                "altitude": float(point["altitude"]),
+                "speed": _optional(point["speed"]),
+                "heading": _optional(point["heading"]),
+                "battery_level": _optional(point["battery_level"]),
+                "status": statuses[point["status"]],
+                "timestamp": datetime.fromtimestamp(float(point["timestamp"]), timezone.utc),
+            }
+            for point in points
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """Memory use and hit counters for monitoring."""
+        with self._lock:
+            drones = len(self._rings)
+            points = sum(ring.count for ring in self._rings.values())
+        bytes_per_drone = self.size * POINT_DTYPE.itemsize
+        return {
+            "drones": drones,
+            "points": points,
+            "bytes_per_drone": bytes_per_drone,
+            "bytes": drones * bytes_per_drone,
+            "max_bytes": self.max_drones * bytes_per_drone,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def _optional(value) -> Optional[float]:
+    """Float of a stored value, None for NaN."""
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+# Other writers' rows would be missing from the rings, leave history to the database then
+telemetry_history = TelemetryHistory(
+    size=settings.TELEMETRY_HISTORY_SIZE if settings.TELEMETRY_SINGLE_WRITER else 0,
+    window=settings.TELEMETRY_HISTORY_WINDOW,
+    max_drones=settings.TELEMETRY_HISTORY_MAX_DRONES,
+)
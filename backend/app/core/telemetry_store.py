@@ -0,0 +1,32 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.telemetry_history import TelemetryHistory, telemetry_history
+from app.core.violations import check_violations
+from app.db.rollups import telemetry_rollups
+from app.db.telemetry_writer import TelemetryRow, telemetry_writer
+
+
+def store_telemetry(
+    db: Session,
+    rows: Sequence[TelemetryRow],
+    history: Optional[TelemetryHistory] = telemetry_history,
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """Check telemetry rows for violations and store them with their rollups.
+
+    Every telemetry write path goes through here, so that raw rows,
+    rollups and violation episodes commit in one transaction and the
+    committed rows reach ``history`` (None when nothing in the process
+    serves it). Returns the violation events.
+    """
+    if not rows:
+        return []
+
+    violations = check_violations(db, rows)
+    telemetry_writer.write(db, rows)
+    telemetry_rollups.write(db, rows)
+    db.commit()
+    if history is not None:
+        history.extend(rows)
+    return violations
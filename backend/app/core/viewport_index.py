@@ -0,0 +1,94 @@
+import math
+from typing import Dict, Hashable, Iterator, List, Set, Tuple
+
+# (min_lon, min_lat, max_lon, max_lat)
+BBox = Tuple[float, float, float, float]
+
+Cell = Tuple[int, int]
+
+
+def parse_bbox(value) -> BBox:
+    """Parse a bounding box from a 4-item list or a "min_lon,min_lat,max_lon,max_lat" string.
+
+    Raises ``ValueError`` on malformed or out-of-range boxes.
+    """
+    if isinstance(value, str):
+        value = value.split(",")
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in value)
+    except (TypeError, ValueError):
+        raise ValueError("bbox must be [min_lon, min_lat, max_lon, max_lat]")
+
+    if not (-180 <= min_lon <= max_lon <= 180 and -90 <= min_lat <= max_lat <= 90):
+        raise ValueError("bbox must satisfy -180 <= min_lon <= max_lon <= 180 and -90 <= min_lat <= max_lat <= 90")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+class ViewportIndex:
+    """Uniform grid over the viewports of map subscribers.
+
+    Each subscriber is registered in the ``cell_size`` degree cells its
+    viewport overlaps, so matching a position only looks at the subscribers
+    of one cell. Viewports covering more than ``max_cells`` cells (zoomed
+    out maps) are kept in a separate list checked for every position.
+    """
+
+    def __init__(self, cell_size: float, max_cells: int):
+        """Initialize the index."""
+        self.cell_size = cell_size
+        self.max_cells = max_cells
+        self._cells: Dict[Cell, Set[Hashable]] = {}
+        self._wide: Set[Hashable] = set()
+        self._viewports: Dict[Hashable, Tuple[BBox, List[Cell]]] = {}
+
+    def _cell(self, longitude: float, latitude: float) -> Cell:
+        """Grid cell containing a position."""
+        return math.floor(longitude / self.cell_size), math.floor(latitude / self.cell_size)
+
+    def set(self, subscriber: Hashable, bbox: BBox):
+        """Register or move the viewport of a subscriber."""
+        self.remove(subscriber)
+
+        min_x, min_y = self._cell(bbox[0], bbox[1])
+        max_x, max_y = self._cell(bbox[2], bbox[3])
+        if (max_x - min_x + 1) * (max_y - min_y + 1) > self.max_cells:
+            self._wide.add(subscriber)
+            self._viewports[subscriber] = (bbox, [])
+            return
+
+        cells = [(x, y) for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1)]
+        for cell in cells:
+            self._cells.setdefault(cell, set()).add(subscriber)
+        self._viewports[subscriber] = (bbox, cells)
+
+    def remove(self, subscriber: Hashable):
+        """Forget the viewport of a subscriber."""
+        entry = self._viewports.pop(subscriber, None)
+        if entry is None:
+            return
+
+        self._wide.discard(subscriber)
+        for cell in entry[1]:
+            subscribers = self._cells[cell]
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._cells[cell]
+
+    def at(self, longitude: float, latitude: float) -> List[Hashable]:
+        """Get the subscribers whose viewport contains a position."""
+        matches = []
+        for candidates in (self._cells.get(self._cell(longitude, latitude), ()), self._wide):
+            for subscriber in candidates:
+                min_lon, min_lat, max_lon, max_lat = self._viewports[subscriber][0]
+                if min_lon <= longitude <= max_lon and min_lat <= latitude <= max_lat:
+                    matches.append(subscriber)
+        return matches
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(list(self._viewports))
+
+    def __contains__(self, subscriber: Hashable) -> bool:
+        return subscriber in self._viewports
+
+    def __len__(self) -> int:
+        return len(self._viewports)
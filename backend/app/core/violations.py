@@ -0,0 +1,344 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from geoalchemy2.shape import from_shape
+from shapely.geometry import Point
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.corridors import corridor_cache
+from app.core.geo import metric_distance
+from app.core.zone_index import zone_index
+from app.db.session import SessionLocal
+from app.db.telemetry_writer import TelemetryRow
+from app.models.violation import Violation, ViolationType
+
+logger = logging.getLogger(__name__)
+
+# An episode is identified by its type and the zone or flight request it refers to
+EpisodeKey = Tuple[ViolationType, UUID]
+
+
+class Condition:
+    """A violation condition observed at one telemetry point."""
+
+    __slots__ = ("type", "penetration", "description", "no_fly_zone_id", "flight_request_id")
+
+    def __init__(
+        self,
+        type: ViolationType,
+        penetration: float,
+        description: str,
+        no_fly_zone_id: Optional[UUID] = None,
+        flight_request_id: Optional[UUID] = None,
+    ):
+        self.type = type
+        self.penetration = penetration
+        self.description = description
+        self.no_fly_zone_id = no_fly_zone_id
+        self.flight_request_id = flight_request_id
+
+
+class Episode:
+    """An open violation episode kept in memory while the condition persists."""
+
+    __slots__ = (
+        "violation", "violation_id", "started_at", "last_seen", "touched",
+        "point_count", "max_penetration", "expires",
+    )
+
+    def __init__(self, violation: Optional[Violation], started_at: datetime, penetration: float):
+        self.violation = violation
+        self.violation_id: Optional[int] = None
+        self.started_at = started_at
+        self.last_seen = started_at
+        # Local clock, so that expiry does not depend on drone clocks
+        self.touched = time.monotonic()
+        self.point_count = 1
+        self.max_penetration = penetration
+        # Whether this process may close it when the drone goes quiet
+        self.expires = True
+
+    def copy(self) -> "Episode":
+        """A copy to stage changes on."""
+        episode = Episode.__new__(Episode)
+        for name in self.__slots__:
+            setattr(episode, name, getattr(self, name))
+        return episode
+
+
+def episode_data(
+    key: EpisodeKey, episode: Episode, status: str, ended_at: Optional[datetime]
+) -> Dict[str, Any]:
+    """Serialize an episode event for broadcasting."""
+    violation_type, subject_id = key
+    data = {
+        "id": episode.violation_id,
+        "type": violation_type.value,
+        "status": status,
+        "started_at": episode.started_at.isoformat(),
+        "ended_at": ended_at.isoformat() if ended_at else None,
+        "point_count": episode.point_count,
+        "max_penetration": episode.max_penetration,
+    }
+    if violation_type == ViolationType.OUT_OF_PATH:
+        data["flight_request_id"] = str(subject_id)
+    else:
+        data["zone_id"] = str(subject_id)
+    return data
+
+
+class ViolationTracker:
+    """Per-drone violation state machine.
+
+    A violation row is inserted when a drone enters a no-fly zone or leaves
+    its corridor, kept in memory while the condition persists, and updated
+    with its end time, point count and maximum penetration when the drone
+    is compliant again or stops reporting for ``timeout`` seconds.
+
+    ``process`` stages its changes on copies of the episodes and they only
+    replace the tracked ones once the session commits, so a rolled back
+    batch leaves the tracker pointing at the rows that exist.
+    """
+
+    def __init__(self, timeout: float):
+        """Initialize the tracker."""
+        self.timeout = timeout
+        self._episodes: Dict[UUID, Dict[EpisodeKey, Episode]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, owns: Optional[Callable[[UUID], bool]] = None, expire: bool = True):
+        """Resume the episodes that were still open when the process stopped.
+
+        ``owns`` limits them to the drones of this ingest shard. With
+        ``expire`` false the resumed episodes are only closed by this process
+        once it has seen their drone, for workers that share drones with
+        others.
+        """
+        db = SessionLocal()
+        try:
+            open_violations = db.query(Violation).filter(Violation.ended_at == None).all()
+        finally:
+            db.close()
+        if owns is not None:
+            open_violations = [violation for violation in open_violations if owns(violation.drone_id)]
+
+        with self._lock:
+            self._episodes.clear()
+            for violation in open_violations:
+                key = (violation.type, violation.no_fly_zone_id or violation.flight_request_id)
+                episode = Episode(None, violation.created_at, violation.max_penetration or 0.0)
+                episode.violation_id = violation.id
+                episode.point_count = violation.point_count
+                episode.expires = expire
+                self._episodes.setdefault(violation.drone_id, {})[key] = episode
+        logger.info(f"Resumed {len(open_violations)} open violation episodes")
+
+    def process(
+        self,
+        db: Session,
+        rows: Sequence[TelemetryRow],
+        conditions: Sequence[List[Condition]],
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """Advance the state machine with the conditions observed at each row.
+
+        New episodes are added to the session and closed ones are updated in
+        it, without committing. The tracked episodes change when the session
+        commits. Returns ``(drone_id, violation)`` pairs for the episodes
+        that were opened or closed.
+        """
+        events = []
+        opened = []
+        closed = []
+        staged: Dict[UUID, Dict[EpisodeKey, Episode]] = {}
+
+        with self._lock:
+            for row, row_conditions in zip(rows, conditions):
+                episodes = staged.get(row.drone_id)
+                if episodes is None:
+                    episodes = staged[row.drone_id] = {
+                        key: episode.copy() for key, episode in self._episodes.get(row.drone_id, {}).items()
+                    }
+                active = {}
+                for condition in row_conditions:
+                    active[(condition.type, condition.no_fly_zone_id or condition.flight_request_id)] = condition
+
+                for key in [key for key in episodes if key not in active]:
+                    episode = episodes.pop(key)
+                    closed.append((episode, row.timestamp))
+                    events.append((row.drone_id, key, episode, "closed", row.timestamp))
+
+                for key, condition in active.items():
+                    episode = episodes.get(key)
+                    if episode is not None:
+                        episode.last_seen = row.timestamp
+                        episode.touched = time.monotonic()
+                        episode.expires = True
+                        episode.point_count += 1
+                        episode.max_penetration = max(episode.max_penetration, condition.penetration)
+                        continue
+
+                    violation = Violation(
+                        drone_id=row.drone_id,
+                        flight_request_id=condition.flight_request_id,
+                        no_fly_zone_id=condition.no_fly_zone_id,
+                        type=condition.type,
+                        location=from_shape(Point(row.longitude, row.latitude), srid=4326),
+                        description=condition.description,
+                        created_at=row.timestamp,
+                        point_count=1,
+                        max_penetration=condition.penetration,
+                    )
+                    db.add(violation)
+                    episode = Episode(violation, row.timestamp, condition.penetration)
+                    episodes[key] = episode
+                    opened.append(episode)
+                    events.append((row.drone_id, key, episode, "open", None))
+
+            closed.extend(self._expire(staged, events))
+
+        updates = []
+        for episode, ended_at in closed:
+            if episode.violation is not None:
+                # Opened and closed within this batch, not inserted yet
+                episode.violation.ended_at = ended_at
+                episode.violation.point_count = episode.point_count
+                episode.violation.max_penetration = episode.max_penetration
+            elif episode.violation_id is not None:
+                updates.append({
+                    "id": episode.violation_id,
+                    "ended_at": ended_at,
+                    "point_count": episode.point_count,
+                    "max_penetration": episode.max_penetration,
+                })
+
+        if opened:
+            # Assign ids so that later updates can address the rows directly
+            db.flush()
+            for episode in opened:
+                episode.violation_id = episode.violation.id
+                episode.violation = None
+
+        if updates:
+            db.execute(update(Violation), updates)
+
+        db.info.setdefault(_STAGED_EPISODES, []).append((self, staged))
+        return [
+            (str(drone_id), episode_data(key, episode, status, ended_at))
+            for drone_id, key, episode, status, ended_at in events
+        ]
+
+    def _expire(
+        self, staged: Dict[UUID, Dict[EpisodeKey, Episode]], events: list
+    ) -> List[Tuple[Episode, datetime]]:
+        """Stage closing the episodes of drones that stopped reporting (lock held)."""
+        expired = []
+        now = time.monotonic()
+        for drone_id, episodes in self._episodes.items():
+            if drone_id in staged:
+                continue
+            stale = [
+                key for key, episode in episodes.items()
+                if episode.expires and now - episode.touched > self.timeout
+            ]
+            if not stale:
+                continue
+            episodes = staged[drone_id] = dict(episodes)
+            for key in stale:
+                episode = episodes.pop(key)
+                expired.append((episode, episode.last_seen))
+                events.append((drone_id, key, episode, "closed", episode.last_seen))
+        return expired
+
+    def _apply(self, staged: Dict[UUID, Dict[EpisodeKey, Episode]]):
+        """Replace the tracked episodes of drones with committed staged ones."""
+        with self._lock:
+            for drone_id, episodes in staged.items():
+                if episodes:
+                    self._episodes[drone_id] = episodes
+                else:
+                    self._episodes.pop(drone_id, None)
+
+
+# Session.info key of the tracker changes waiting for the session to commit
+_STAGED_EPISODES = "staged_violation_episodes"
+
+
+def _apply_staged_episodes(session: Session):
+    """Apply the tracker changes of a committed session."""
+    for tracker, staged in session.info.pop(_STAGED_EPISODES, ()):
+        tracker._apply(staged)
+
+
+def _discard_staged_episodes(session: Session):
+    """Forget the tracker changes of a rolled back session."""
+    session.info.pop(_STAGED_EPISODES, None)
+
+
+event.listen(Session, "after_commit", _apply_staged_episodes)
+event.listen(Session, "after_rollback", _discard_staged_episodes)
+
+
+violation_tracker = ViolationTracker(timeout=settings.VIOLATION_EPISODE_TIMEOUT)
+
+
+def evaluate_conditions(rows: Sequence[TelemetryRow]) -> List[List[Condition]]:
+    """Find the no-fly zone and corridor conditions of each telemetry row."""
+    if not rows:
+        return []
+
+    hits = zone_index.classify(
+        [row.longitude for row in rows],
+        [row.latitude for row in rows],
+        [row.altitude for row in rows],
+    )
+
+    conditions = []
+    for row, zones in zip(rows, hits):
+        row_conditions = []
+        for zone in zones:
+            if zone.is_ceiling:
+                # Flying lower would have been legal here
+                row_conditions.append(Condition(
+                    type=ViolationType.ALTITUDE_VIOLATION,
+                    penetration=row.altitude - zone.min_altitude,
+                    description=f"Drone above {zone.min_altitude}m altitude limit of zone: {zone.name}",
+                    no_fly_zone_id=zone.id,
+                ))
+            else:
+                row_conditions.append(Condition(
+                    type=ViolationType.NO_FLY_ZONE,
+                    penetration=metric_distance(zone.area.boundary, row.longitude, row.latitude),
+                    description=f"Drone entered no-fly zone: {zone.name}",
+                    no_fly_zone_id=zone.id,
+                ))
+
+        corridor = corridor_cache.get(row.drone_id)
+        if corridor is not None:
+            if not corridor.area.contains(Point(row.longitude, row.latitude)):
+                row_conditions.append(Condition(
+                    type=ViolationType.OUT_OF_PATH,
+                    penetration=metric_distance(corridor.area, row.longitude, row.latitude),
+                    description="Drone has deviated from approved flight path",
+                    flight_request_id=corridor.flight_request_id,
+                ))
+
+        conditions.append(row_conditions)
+
+    return conditions
+
+
+def check_violations(
+    db: Session, rows: Sequence[TelemetryRow]
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """Check a batch of telemetry rows and update violation episodes.
+
+    Changes are added to the caller's session but not committed, so they
+    land in the same transaction as the telemetry itself.
+    """
+    return violation_tracker.process(db, rows, evaluate_conditions(rows))
@@ -0,0 +1,252 @@
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+from uuid import UUID
+
+import numpy as np
+import shapely
+import shapely.wkb
+from shapely import STRtree
+from shapely.geometry.base import BaseGeometry
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.no_fly_zone import NoFlyZone
+
+logger = logging.getLogger(__name__)
+
+
+class ZoneEntry(NamedTuple):
+    """Prepared no-fly zone held by the zone index.
+
+    The zone is the volume between ``min_altitude`` and ``max_altitude``
+    (open-ended when None) above its footprint.
+    """
+    id: UUID
+    name: str
+    area: BaseGeometry
+    min_altitude: Optional[float]
+    max_altitude: Optional[float]
+    description: Optional[str] = None
+
+    @property
+    def is_ceiling(self) -> bool:
+        """Whether the zone only starts above ground, capping flight altitude."""
+        return self.min_altitude is not None and self.min_altitude > 0
+
+
+def build_zone_entry(zone: NoFlyZone) -> ZoneEntry:
+    """Decode and prepare the area of a no-fly zone."""
+    area = shapely.wkb.loads(bytes(zone.area.data))
+    shapely.prepare(area)
+    return ZoneEntry(zone.id, zone.name, area, zone.min_altitude, zone.max_altitude, zone.description)
+
+
+class ZoneSnapshot(NamedTuple):
+    """Immutable view of the index, swapped as a whole on every change."""
+    entries: List[ZoneEntry]
+    tree: Optional[STRtree]
+    areas: np.ndarray
+    min_altitude: np.ndarray
+    max_altitude: np.ndarray
+
+
+EMPTY_SNAPSHOT = ZoneSnapshot([], None, np.empty(0, dtype=object), np.empty(0), np.empty(0))
+
+
+class ZoneIndex:
+    """In-memory STRtree over the active no-fly zones.
+
+    Answers point-in-zone queries without a database round trip, for one
+    point (``zones_at``) or for whole batches with shapely's vectorized
+    predicates (``classify``). The no-fly zones API patches the index on
+    create/update/delete, and it is reloaded every ``refresh_interval``
+    seconds to pick up changes made by other processes. Reloads run on a
+    background thread, one at a time, and queries keep using the current
+    snapshot until the new one is swapped in.
+    """
+
+    def __init__(self, refresh_interval: float):
+        """Initialize the index."""
+        self.refresh_interval = refresh_interval
+        self._zones: Dict[UUID, ZoneEntry] = {}
+        self._snapshot = EMPTY_SNAPSHOT
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+        # Counts local patches, a reload that overlaps one is discarded
+        self._changes = 0
+
+    def load(self):
+        """Load all active no-fly zones and rebuild the tree."""
+        with self._lock:
+            changes = self._changes
+        db = SessionLocal()
+        try:
+            zones = db.query(NoFlyZone).filter(NoFlyZone.active == True).all()
+        finally:
+            db.close()
+
+        entries = [build_zone_entry(zone) for zone in zones]
+        with self._lock:
+            if self._changes != changes:
+                # Patched meanwhile, the loaded zones may already be stale
+                logger.info("No-fly zones changed while loading, keeping the current index")
+                return
+            self._set_zones(entries)
+        logger.info(f"Loaded {len(zones)} active no-fly zones into the zone index")
+
+    def set_zones(self, entries: Iterable[ZoneEntry]):
+        """Replace the whole index with the given prepared zones."""
+        with self._lock:
+            self._changes += 1
+            self._set_zones(entries)
+
+    def _set_zones(self, entries: Iterable[ZoneEntry]):
+        """Replace the whole index (lock held)."""
+        self._zones = {entry.id: entry for entry in entries}
+        self._rebuild()
+        self._loaded_at = time.monotonic()
+
+    def upsert(self, zone: NoFlyZone):
+        """Add, replace or drop a zone after it was created or updated."""
+        with self._lock:
+            self._changes += 1
+            if zone.active:
+                self._zones[zone.id] = build_zone_entry(zone)
+            else:
+                self._zones.pop(zone.id, None)
+            self._rebuild()
+
+    def remove(self, zone_id: UUID):
+        """Drop a zone after it was deleted."""
+        with self._lock:
+            self._changes += 1
+            if self._zones.pop(zone_id, None) is not None:
+                self._rebuild()
+
+    def _rebuild(self):
+        """Rebuild the tree from the prepared entries (lock held)."""
+        entries = list(self._zones.values())
+        if not entries:
+            self._snapshot = EMPTY_SNAPSHOT
+            return
+
+        areas = np.empty(len(entries), dtype=object)
+        areas[:] = [entry.area for entry in entries]
+        # Open-ended altitude bands become infinite bounds
+        min_altitude = np.array(
+            [-np.inf if entry.min_altitude is None else entry.min_altitude for entry in entries]
+        )
+        max_altitude = np.array(
+            [np.inf if entry.max_altitude is None else entry.max_altitude for entry in entries]
+        )
+        self._snapshot = ZoneSnapshot(entries, STRtree(areas), areas, min_altitude, max_altitude)
+
+    def _current(self) -> ZoneSnapshot:
+        """Get the current snapshot, starting a background reload when it is stale."""
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_interval:
+            with self._lock:
+                refresh = not self._refreshing
+                self._refreshing = True
+            if refresh:
+                threading.Thread(target=self._refresh, name="zone-index-refresh", daemon=True).start()
+        return self._snapshot
+
+    def _refresh(self):
+        """Reload the index, waiting a whole interval before retrying a failed reload."""
+        try:
+            self.load()
+        except Exception as e:
+            logger.error(f"Error reloading the zone index: {e}")
+            self._loaded_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def zones_at(
+        self, longitude: float, latitude: float, altitude: Optional[float] = None
+    ) -> List[ZoneEntry]:
+        """Get the zones containing a single point."""
+        snapshot = self._current()
+        if snapshot.tree is None:
+            return []
+
+        zones = []
+        for i in snapshot.tree.query(shapely.points(longitude, latitude)):
+            if altitude is not None and not (
+                snapshot.min_altitude[i] <= altitude <= snapshot.max_altitude[i]
+            ):
+                continue
+            if shapely.contains_xy(snapshot.areas[i], longitude, latitude):
+                zones.append(snapshot.entries[i])
+        return zones
+
+    def classify(
+        self,
+        longitudes: Sequence[float],
+        latitudes: Sequence[float],
+        altitudes: Optional[Sequence[float]] = None,
+    ) -> List[List[ZoneEntry]]:
+        """Get the zones containing each of a batch of points.
+
+        Candidates come from one bulk STRtree query and, when altitudes are
+        given, are pruned by altitude band before any polygon test. The
+        remaining pairs are tested with a single vectorized ``contains_xy``.
+        """
+        snapshot = self._current()
+        longitudes = np.asarray(longitudes, dtype=float)
+        latitudes = np.asarray(latitudes, dtype=float)
+        result: List[List[ZoneEntry]] = [[] for _ in range(len(longitudes))]
+        if snapshot.tree is None or not len(longitudes):
+            return result
+
+        if altitudes is not None:
+            altitudes = np.asarray(altitudes, dtype=float)
+            # Points below or above every band need no spatial query at all
+            candidates = np.flatnonzero(
+                (altitudes >= snapshot.min_altitude.min()) & (altitudes <= snapshot.max_altitude.max())
+            )
+        else:
+            candidates = np.arange(len(longitudes))
+
+        point_idx, zone_idx = snapshot.tree.query(
+            shapely.points(longitudes[candidates], latitudes[candidates])
+        )
+        point_idx = candidates[point_idx]
+
+        if altitudes is not None:
+            point_altitudes = altitudes[point_idx]
+            in_band = (point_altitudes >= snapshot.min_altitude[zone_idx]) & (
+                point_altitudes <= snapshot.max_altitude[zone_idx]
+            )
+            point_idx = point_idx[in_band]
+            zone_idx = zone_idx[in_band]
+
+        inside = shapely.contains_xy(
+            snapshot.areas[zone_idx], longitudes[point_idx], latitudes[point_idx]
+        )
+        for p, z in zip(point_idx[inside].tolist(), zone_idx[inside].tolist()):
+            result[p].append(snapshot.entries[z])
+        return result
+
+    def zones_along(self, geometry: BaseGeometry, altitude: Optional[float] = None) -> List[ZoneEntry]:
+        """Get the zones a route or area crosses, optionally at a given altitude."""
+        snapshot = self._current()
+        if snapshot.tree is None:
+            return []
+
+        zone_idx = snapshot.tree.query(geometry)
+        if altitude is not None:
+            zone_idx = zone_idx[
+                (snapshot.min_altitude[zone_idx] <= altitude) & (altitude <= snapshot.max_altitude[zone_idx])
+            ]
+        crossed = shapely.intersects(snapshot.areas[zone_idx], geometry)
+        return [snapshot.entries[i] for i in zone_idx[crossed].tolist()]
+
+    def __len__(self) -> int:
+        return len(self._zones)
+
+
+zone_index = ZoneIndex(refresh_interval=settings.ZONE_INDEX_REFRESH)
@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.core.config import settings
+from app.db.session import engine
+from app.models.telemetry import DroneTelemetry
+from app.models.telemetry_rollup import TelemetryRollup
+
+logger = logging.getLogger(__name__)
+
+# pg_advisory_xact_lock key serializing maintenance across processes
+_LOCK_KEY = 0x7E1E0001
+
+_BOUND = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _parse_timestamp(value: str) -> datetime:
+    """Parse a timestamptz literal from a partition bound."""
+    # PostgreSQL prints offsets as +00, fromisoformat wants +00:00
+    if re.search(r"[+-]\d\d$", value):
+        value += ":00"
+    return datetime.fromisoformat(value).astimezone(timezone.utc)
+
+
+class TelemetryPartitions:
+    """Time range partitions of a telemetry table, on its ``column``.
+
+    Every ``interval_days`` (UTC, aligned on the Unix epoch) gets its own
+    partition, named after the day it starts on. ``maintain`` creates the
+    partitions up to ``premake`` intervals ahead and drops whole partitions
+    older than ``retention_days``, instead of deleting rows. Rows outside
+    every partition go to a default partition; they are moved into their
+    partition once it is created.
+    """
+
+    def __init__(
+        self,
+        table: str,
+        column: str,
+        interval_days: int,
+        premake: int,
+        retention_days: int,
+        check_interval: float,
+    ):
+        """Initialize the partition manager."""
+        self.table = table
+        self.column = column
+        self.interval = timedelta(days=interval_days)
+        self.premake = premake
+        self.retention = timedelta(days=retention_days) if retention_days > 0 else None
+        self.check_interval = check_interval
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def default_partition(self) -> str:
+        """Name of the partition for rows outside every range."""
+        return f"{self.table}_default"
+
+    def partition_name(self, start: datetime) -> str:
+        """Name of the partition starting at ``start``."""
+        return f"{self.table}_p{start:%Y%m%d}"
+
+    def interval_start(self, moment: datetime) -> datetime:
+        """Start of the interval containing ``moment``."""
+        intervals = (moment - _EPOCH) // self.interval
+        return _EPOCH + intervals * self.interval
+
+    def maintain(self, now: Optional[datetime] = None) -> Tuple[List[str], List[str]]:
+        """Create upcoming partitions and drop expired ones.
+
+        Returns the names of the created and dropped partitions.
+        """
+        now = now or datetime.now(timezone.utc)
+        created: List[str] = []
+        dropped: List[str] = []
+        with engine.begin() as connection:
+            if connection.dialect.name != "postgresql":
+                return created, dropped
+
+            kind = connection.execute(
+                text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"),
+                {"table": self.table},
+            ).scalar()
+            if kind != "p":
+                logger.warning(f"{self.table} is not partitioned (run alembic upgrade head), skipping partition maintenance")
+                return created, dropped
+
+            # Other API workers run the same maintenance
+            connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _LOCK_KEY})
+
+            start = self.interval_start(now)
+            created = self.ensure(connection, start, start + (self.premake + 1) * self.interval)
+
+            if self.retention is not None:
+                cutoff = now - self.retention
+                for name, _, upper in self._partitions(connection):
+                    if upper <= cutoff:
+                        connection.execute(text(f'DROP TABLE "{name}"'))
+                        dropped.append(name)
+                connection.execute(
+                    text(f'DELETE FROM "{self.default_partition}" WHERE "{self.column}" < :cutoff'),
+                    {"cutoff": cutoff},
+                )
+
+        for name in created:
+            logger.info(f"Created partition {name}")
+        for name in dropped:
+            logger.info(f"Dropped partition {name}")
+        return created, dropped
+
+    def ensure(self, connection: Connection, start: datetime, end: datetime) -> List[str]:
+        """Create the default partition and the missing partitions from ``start`` to ``end``.
+
+        Returns the names of the created partitions.
+        """
+        connection.execute(text(
+            f'CREATE TABLE IF NOT EXISTS "{self.default_partition}" PARTITION OF "{self.table}" DEFAULT'
+        ))
+        partitions = self._partitions(connection)
+
+        created = []
+        start = self.interval_start(start)
+        while start < end:
+            upper = start + self.interval
+            if not any(lower < upper and start < existing for _, lower, existing in partitions):
+                name = self.partition_name(start)
+                self._create(connection, name, start, upper)
+                partitions.append((name, start, upper))
+                created.append(name)
+            start = upper
+        return created
+
+    def _partitions(self, connection: Connection) -> List[Tuple[str, datetime, datetime]]:
+        """Get the ``(name, start, end)`` range partitions of the table."""
+        rows = connection.execute(
+            text(
+                "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+                "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = to_regclass(:table)"
+            ),
+            {"table": self.table},
+        ).all()
+
+        partitions = []
+        for name, bound in rows:
+            match = _BOUND.search(bound or "")
+            if match:
+                partitions.append((name, _parse_timestamp(match.group(1)), _parse_timestamp(match.group(2))))
+        return partitions
+
+    def _create(self, connection: Connection, name: str, start: datetime, end: datetime):
+        """Create a partition, moving its rows out of the default partition.
+
+        A partition cannot be created while the default partition holds rows
+        in its range, so it is built as a plain table and attached instead.
+        """
+        connection.execute(text(
+            f'CREATE TABLE "{name}" (LIKE "{self.table}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+        ))
+        connection.execute(
+            text(
+                f'WITH moved AS (DELETE FROM "{self.default_partition}" '
+                f'WHERE "{self.column}" >= :start AND "{self.column}" < :end RETURNING *) '
+                f'INSERT INTO "{name}" SELECT * FROM moved'
+            ),
+            {"start": start, "end": end},
+        )
+        connection.execute(text(
+            f'ALTER TABLE "{self.table}" ATTACH PARTITION "{name}" '
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        ))
+
+    async def start(self):
+        """Maintain partitions now and every ``check_interval`` seconds."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.maintain)
+        self._task = loop.create_task(self._run())
+
+    async def stop(self):
+        """Stop the periodic maintenance."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        """Run maintenance periodically until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await loop.run_in_executor(None, self.maintain)
+            except Exception as e:
+                logger.error(f"Partition maintenance of {self.table} failed: {e}")
+
+
+telemetry_partitions = TelemetryPartitions(
+    table=DroneTelemetry.__tablename__,
+    column="timestamp",
+    interval_days=settings.TELEMETRY_PARTITION_DAYS,
+    premake=settings.TELEMETRY_PARTITION_PREMAKE,
+    retention_days=settings.TELEMETRY_RETENTION_DAYS,
+    check_interval=settings.TELEMETRY_PARTITION_CHECK_INTERVAL,
+)
+
+rollup_partitions = TelemetryPartitions(
+    table=TelemetryRollup.__tablename__,
+    column="bucket",
+    interval_days=settings.TELEMETRY_ROLLUP_PARTITION_DAYS,
+    premake=settings.TELEMETRY_PARTITION_PREMAKE,
+    retention_days=settings.TELEMETRY_ROLLUP_RETENTION_DAYS,
+    check_interval=settings.TELEMETRY_PARTITION_CHECK_INTERVAL,
+)
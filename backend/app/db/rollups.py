@@ -0,0 +1,197 @@
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import case, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.db.telemetry_writer import TelemetryRow
+from app.models.telemetry_rollup import TelemetryRollup
+
+logger = logging.getLogger(__name__)
+
+# Rollup resolutions by name, in seconds
+RESOLUTIONS: Dict[str, int] = {"10s": 10, "1m": 60, "10m": 600}
+
+_KEY = ("drone_id", "resolution", "bucket")
+
+
+def bucket_start(moment: datetime, resolution: int) -> datetime:
+    """Start of the ``resolution`` seconds bucket containing ``moment``."""
+    seconds = moment.timestamp()
+    return datetime.fromtimestamp(seconds - seconds % resolution, timezone.utc)
+
+
+def choose_resolution(start_time: datetime, end_time: datetime, limit: int) -> int:
+    """Finest rollup resolution whose buckets over a range fit in ``limit`` points.
+
+    Falls back to the coarsest resolution when none does.
+    """
+    span = (end_time - start_time).total_seconds()
+    resolutions = sorted(RESOLUTIONS.values())
+    for resolution in resolutions:
+        if span / resolution <= limit:
+            return resolution
+    return resolutions[-1]
+
+
+def _merge_statement():
+    """INSERT ... ON CONFLICT merging new aggregates into existing buckets."""
+    statement = insert(TelemetryRollup.__table__)
+    new = statement.excluded
+    old = TelemetryRollup.__table__.c
+    earlier = new.first_time < old.first_time
+    later = new.last_time >= old.last_time
+    return statement.on_conflict_do_update(
+        index_elements=list(_KEY),
+        set_={
+            "point_count": old.point_count + new.point_count,
+            "first_time": func.least(old.first_time, new.first_time),
+            "first_longitude": case((earlier, new.first_longitude), else_=old.first_longitude),
+            "first_latitude": case((earlier, new.first_latitude), else_=old.first_latitude),
+            "last_time": func.greatest(old.last_time, new.last_time),
+            "last_longitude": case((later, new.last_longitude), else_=old.last_longitude),
+            "last_latitude": case((later, new.last_latitude), else_=old.last_latitude),
+            "sum_longitude": old.sum_longitude + new.sum_longitude,
+            "sum_latitude": old.sum_latitude + new.sum_latitude,
+            "sum_altitude": old.sum_altitude + new.sum_altitude,
+            "min_altitude": func.least(old.min_altitude, new.min_altitude),
+            "max_altitude": func.greatest(old.max_altitude, new.max_altitude),
+            "sum_speed": old.sum_speed + new.sum_speed,
+            "speed_count": old.speed_count + new.speed_count,
+            # LEAST ignores NULLs
+            "min_battery": func.least(old.min_battery, new.min_battery),
+        },
+    )
+
+
+class TelemetryRollups:
+    """Writer and reader of the multi-resolution telemetry rollups.
+
+    ``write`` aggregates a batch of rows per drone, resolution and bucket in
+    Python and merges the aggregates into telemetry_rollups with one
+    upsert, in the caller's transaction, so the rollups commit together
+    with the raw rows.
+    """
+
+    def __init__(self, resolutions: Iterable[int]):
+        """Initialize the rollups."""
+        self.resolutions = sorted(resolutions)
+        self._merge = _merge_statement()
+
+    def write(self, db: Session, rows: Iterable[TelemetryRow]) -> int:
+        """Merge rows into the rollups in the session's transaction (no commit).
+
+        Returns the number of buckets touched.
+        """
+        if db.get_bind().dialect.name != "postgresql":
+            return 0
+
+        buckets: Dict[Tuple[UUID, int, datetime], Dict[str, Any]] = {}
+        for row in rows:
+            for resolution in self.resolutions:
+                key = (row.drone_id, resolution, bucket_start(row.timestamp, resolution))
+                bucket = buckets.get(key)
+                if bucket is None:
+                    buckets[key] = {
+                        "drone_id": row.drone_id,
+                        "resolution": resolution,
+                        "bucket": key[2],
+                        "point_count": 1,
+                        "first_time": row.timestamp,
+                        "first_longitude": row.longitude,
+                        "first_latitude": row.latitude,
+                        "last_time": row.timestamp,
+                        "last_longitude": row.longitude,
+                        "last_latitude": row.latitude,
+                        "sum_longitude": row.longitude,
+                        "sum_latitude": row.latitude,
+                        "sum_altitude": row.altitude,
+                        "min_altitude": row.altitude,
+                        "max_altitude": row.altitude,
+                        "sum_speed": row.speed or 0.0,
+                        "speed_count": 0 if row.speed is None else 1,
+                        "min_battery": row.battery_level,
+                    }
+                    continue
+
+                bucket["point_count"] += 1
+                if row.timestamp < bucket["first_time"]:
+                    bucket["first_time"] = row.timestamp
+                    bucket["first_longitude"] = row.longitude
+                    bucket["first_latitude"] = row.latitude
+                if row.timestamp >= bucket["last_time"]:
+                    bucket["last_time"] = row.timestamp
+                    bucket["last_longitude"] = row.longitude
+                    bucket["last_latitude"] = row.latitude
+                bucket["sum_longitude"] += row.longitude
+                bucket["sum_latitude"] += row.latitude
+                bucket["sum_altitude"] += row.altitude
+                bucket["min_altitude"] = min(bucket["min_altitude"], row.altitude)
+                bucket["max_altitude"] = max(bucket["max_altitude"], row.altitude)
+                if row.speed is not None:
+                    bucket["sum_speed"] += row.speed
+                    bucket["speed_count"] += 1
+                if row.battery_level is not None:
+                    if bucket["min_battery"] is None or row.battery_level < bucket["min_battery"]:
+                        bucket["min_battery"] = row.battery_level
+
+        if not buckets:
+            return 0
+        # Same lock order in every writer, ingest shards may share drones
+        db.execute(self._merge, [buckets[key] for key in sorted(buckets)])
+        return len(buckets)
+
+    def query(
+        self,
+        db: Session,
+        drone_id: UUID,
+        resolution: int,
+        limit: int,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """Get the newest ``limit`` buckets of a drone in a time range, oldest first."""
+        query = db.query(TelemetryRollup).filter(
+            TelemetryRollup.drone_id == drone_id,
+            TelemetryRollup.resolution == resolution,
+        )
+        if start_time:
+            query = query.filter(TelemetryRollup.bucket >= bucket_start(start_time, resolution))
+        if end_time:
+            query = query.filter(TelemetryRollup.bucket <= end_time)
+
+        rollups = query.order_by(TelemetryRollup.bucket.desc()).limit(limit).all()
+        rollups.reverse()
+        return [_rollup_point(rollup) for rollup in rollups]
+
+
+def _rollup_point(rollup: TelemetryRollup) -> Dict[str, Any]:
+    """A rollup in the shape of TelemetryRollupResponse."""
+    count = rollup.point_count
+    return {
+        "drone_id": rollup.drone_id,
+        "resolution": rollup.resolution,
+        "timestamp": rollup.bucket,
+        "point_count": count,
+        # Centroid and averages stand in for the point of a raw sample
+        "longitude": rollup.sum_longitude / count,
+        "latitude": rollup.sum_latitude / count,
+        "altitude": rollup.sum_altitude / count,
+        "speed": rollup.sum_speed / rollup.speed_count if rollup.speed_count else None,
+        "battery_level": rollup.min_battery,
+        "first_time": rollup.first_time,
+        "first_longitude": rollup.first_longitude,
+        "first_latitude": rollup.first_latitude,
+        "last_time": rollup.last_time,
+        "last_longitude": rollup.last_longitude,
+        "last_latitude": rollup.last_latitude,
+        "min_altitude": rollup.min_altitude,
+        "max_altitude": rollup.max_altitude,
+        "min_battery": rollup.min_battery,
+    }
+
+
+telemetry_rollups = TelemetryRollups(RESOLUTIONS.values())
@@ -1,3 +1,8 @@
+from pathlib import Path
+
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
@@ -13,6 +18,9 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Create Base class for ORM models
 Base = declarative_base()
 
+# Migration configuration, in the backend directory
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
 def get_db():
     """Dependency for getting DB session."""
     db = SessionLocal()
@@ -22,5 +30,18 @@ def get_db():
         db.close()
 
 def init_db():
-    """Initialize the database."""
-    Base.metadata.create_all(bind=engine) 
\ No newline at end of file
+    """Check that the database schema is at the latest migration.
+
+    The schema is managed by Alembic (``alembic upgrade head``), not created
+    at startup.
+    """
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+    heads = set(ScriptDirectory.from_config(config).get_heads())
+    with engine.connect() as connection:
+        current = set(MigrationContext.configure(connection).get_current_heads())
+    if current != heads:
+        raise RuntimeError(
+            f"Database schema is at {sorted(current) or 'no revision'}, expected {sorted(heads)}: "
+            f"run `alembic upgrade head` in the backend directory"
+        )
@@ -0,0 +1,171 @@
+import io
+import logging
+import struct
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.models.telemetry import DroneTelemetry
+
+logger = logging.getLogger(__name__)
+
+
+# Little-endian EWKB header for a POINT with SRID 4326
+_EWKB_POINT_4326 = struct.pack("<BII", 1, 0x20000001, 4326)
+
+_COPY_COLUMNS = (
+    "drone_id", "location", "altitude", "speed", "heading",
+    "battery_level", "status", "timestamp",
+)
+_COPY_SQL = (
+    f"COPY {DroneTelemetry.__tablename__} ({', '.join(_COPY_COLUMNS)}) FROM STDIN"
+)
+
+
+class TelemetryRow(NamedTuple):
+    """Plain telemetry record accepted by the bulk writer."""
+    drone_id: UUID
+    longitude: float
+    latitude: float
+    altitude: float
+    speed: Optional[float]
+    heading: Optional[float]
+    battery_level: Optional[float]
+    status: Optional[str]
+    timestamp: datetime
+
+
+def telemetry_message(row: TelemetryRow) -> Dict[str, Any]:
+    """Serialize a telemetry row in the JSON telemetry format for broadcasting."""
+    return {
+        "drone_id": str(row.drone_id),
+        "timestamp": row.timestamp.isoformat(),
+        "location": {
+            "type": "Point",
+            "coordinates": [row.longitude, row.latitude],
+        },
+        "altitude": row.altitude,
+        "speed": row.speed,
+        "heading": row.heading,
+        "battery_level": row.battery_level,
+        "status": row.status,
+    }
+
+
+def point_ewkb_hex(longitude: float, latitude: float) -> str:
+    """Encode a point as hex EWKB (SRID 4326), the PostGIS text input format."""
+    return (_EWKB_POINT_4326 + struct.pack("<dd", longitude, latitude)).hex()
+
+
+def _copy_value(value) -> str:
+    """Format a value for COPY text format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, str):
+        return (
+            value.replace("\\", "\\\\")
+            .replace("\t", "\\t")
+            .replace("\n", "\\n")
+            .replace("\r", "\\r")
+        )
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class TelemetryWriter:
+    """Bulk writer for the drone_telemetry table.
+
+    Rows are streamed with ``COPY ... FROM STDIN`` on the session's own
+    connection, so they commit together with anything else the caller adds
+    to the session. When the driver has no COPY support the rows are sent
+    with a single executemany insert instead.
+    """
+
+    def __init__(self, use_copy: bool = True):
+        """Initialize the writer."""
+        self.use_copy = use_copy
+        self.rows_written = 0
+        self.seconds_spent = 0.0
+        self.last_method: Optional[str] = None
+
+    @property
+    def rows_per_second(self) -> float:
+        """Average write throughput since the writer was created."""
+        if not self.seconds_spent:
+            return 0.0
+        return self.rows_written / self.seconds_spent
+
+    def write(self, db: Session, rows: Iterable[TelemetryRow]) -> int:
+        """Write telemetry rows in the session's transaction (no commit)."""
+        rows = list(rows)
+        if not rows:
+            return 0
+
+        started = time.perf_counter()
+        cursor = None
+        if self.use_copy and db.get_bind().dialect.name == "postgresql":
+            cursor = db.connection().connection.dbapi_connection.cursor()
+
+        try:
+            if cursor is not None and hasattr(cursor, "copy_expert"):
+                self._copy(cursor, rows)
+                self.last_method = "copy"
+            else:
+                self._executemany(db, rows)
+                self.last_method = "executemany"
+        finally:
+            if cursor is not None:
+                cursor.close()
+
+        elapsed = time.perf_counter() - started
+        self.rows_written += len(rows)
+        self.seconds_spent += elapsed
+        logger.debug(
+            f"Wrote {len(rows)} telemetry rows via {self.last_method} "
+            f"({len(rows) / elapsed if elapsed else 0:.0f} rows/s)"
+        )
+        return len(rows)
+
+    def _copy(self, cursor, rows: List[TelemetryRow]):
+        """Stream rows through COPY in text format."""
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write("\t".join((
+                str(row.drone_id),
+                point_ewkb_hex(row.longitude, row.latitude),
+                _copy_value(row.altitude),
+                _copy_value(row.speed),
+                _copy_value(row.heading),
+                _copy_value(row.battery_level),
+                _copy_value(row.status),
+                _copy_value(row.timestamp),
+            )))
+            buffer.write("\n")
+        buffer.seek(0)
+        cursor.copy_expert(_COPY_SQL, buffer)
+
+    def _executemany(self, db: Session, rows: List[TelemetryRow]):
+        """Insert rows with one executemany statement."""
+        db.execute(
+            DroneTelemetry.__table__.insert(),
+            [
+                {
+                    "drone_id": row.drone_id,
+                    "location": f"SRID=4326;POINT({row.longitude} {row.latitude})",
+                    "altitude": row.altitude,
+                    "speed": row.speed,
+                    "heading": row.heading,
+                    "battery_level": row.battery_level,
+                    "status": row.status,
+                    "timestamp": row.timestamp,
+                }
+                for row in rows
+            ],
+        )
+
+
+telemetry_writer = TelemetryWriter()
@@ -0,0 +1,134 @@
+"""
+Sharded telemetry ingest - runs N MQTT ingest worker processes outside the
+API, for deployments where a single consumer is the bottleneck.
+
+    python -m app.ingest --workers 4 --mode hash
+
+In "hash" mode every worker subscribes to all telemetry and keeps only the
+drones hashed to its shard, so a drone always lands on the same worker and
+its per-drone state (violation episodes, corridors) stays local. In
+"shared" mode workers join the MQTT shared subscription group
+``$share/<INGEST_SHARE_GROUP>/drones/+/telemetry``; the broker then spreads
+messages between them, which saves bandwidth but only keeps drones on one
+worker if the broker's sharing strategy is sticky.
+
+Set INGEST_IN_API=false on the API when running these workers: every
+process that ingests stores every message it receives, so an ingesting
+API would store them a second time. Live
+telemetry reaches the API workers' WebSocket clients over the fan-out bus,
+so FANOUT_BACKEND must be "postgres" or "redis".
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import signal
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def run_shard(shard_index: int, shard_count: int, shard_mode: str, report_interval: float):
+    """Run one ingest worker until it receives SIGTERM/SIGINT."""
+    from app.core.corridors import corridor_cache
+    from app.core.drone_registry import drone_registry
+    from app.core.mqtt_client import MQTTClient, shard_for_drone
+    from app.core.violations import violation_tracker
+    from app.core.zone_index import zone_index
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f"%(asctime)s shard {shard_index}/{shard_count} %(levelname)s %(name)s: %(message)s",
+    )
+
+    drone_registry.load()
+    corridor_cache.load()
+    zone_index.load()
+    if shard_count > 1 and shard_mode == "hash":
+        violation_tracker.load(owns=lambda drone_id: shard_for_drone(str(drone_id), shard_count) == shard_index)
+    else:
+        # Shared workers cannot tell whether another worker still sees a drone
+        violation_tracker.load(expire=shard_count <= 1)
+
+    # History queries are served by the API, not by ingest workers
+    client = MQTTClient(shard_index=shard_index, shard_count=shard_count, shard_mode=shard_mode, history=None)
+    client.connect()
+    asyncio.run(serve(client, report_interval))
+
+
+async def serve(client, report_interval: float):
+    """Run the ingest tasks and report throughput until SIGTERM/SIGINT."""
+    from app.core.fanout import fanout_bus
+
+    if not fanout_bus.forwarding:
+        logger.warning("FANOUT_BACKEND is local, live telemetry will not reach the API workers")
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGTERM, stopping.set)
+    loop.add_signal_handler(signal.SIGINT, stopping.set)
+
+    # Publish only, the API workers forward to their WebSocket clients
+    await fanout_bus.start()
+    await client.start()
+
+    received = stored = 0
+    while not stopping.is_set():
+        try:
+            await asyncio.wait_for(stopping.wait(), report_interval)
+        except asyncio.TimeoutError:
+            pass
+
+        logger.info(
+            f"{(client.received_messages - received) / report_interval:.0f} msg/s received, "
+            f"{(client.stored_messages - stored) / report_interval:.0f} msg/s stored, "
+            f"{client.skipped_messages} skipped, {client.coalesced_messages} coalesced, "
+            f"{client.sampled_out_messages} sampled out, {client.dropped_messages} dropped, "
+            f"{client.live_latency * 1000:.1f} ms live latency"
+        )
+        received = client.received_messages
+        stored = client.stored_messages
+
+    await client.stop()
+    await fanout_bus.stop()
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Sharded telemetry ingest")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(), help="Number of worker processes")
+    parser.add_argument("--mode", choices=["hash", "shared"], default="hash", help="Sharding mode")
+    parser.add_argument("--report-interval", type=float, default=10.0, help="Seconds between throughput reports")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    logger.info(
+        f"Starting {args.workers} {args.mode} ingest workers against "
+        f"{settings.MQTT_BROKER_HOST}:{settings.MQTT_BROKER_PORT}"
+    )
+
+    workers = [
+        multiprocessing.Process(
+            target=run_shard,
+            args=(index, args.workers, args.mode, args.report_interval),
+            name=f"ingest-{index}",
+        )
+        for index in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.join()
+
+
+if __name__ == "__main__":
+    main()
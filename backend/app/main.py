@@ -4,7 +4,15 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.api import api_router
 from app.ws import telemetry_ws
 from app.db.session import init_db
+from app.db.partitions import rollup_partitions, telemetry_partitions
+from app.core.config import settings
+from app.core.fanout import fanout_bus
 from app.core.mqtt_client import mqtt_client
+from app.core.drone_registry import drone_registry
+from app.core.last_known import last_known
+from app.core.corridors import corridor_cache
+from app.core.zone_index import zone_index
+from app.core.violations import violation_tracker
 
 
 app = FastAPI(
@@ -33,14 +41,30 @@ app.include_router(telemetry_ws.router)
 async def startup_event():
     """Initialize the database and start MQTT client on startup."""
     init_db()
+    await telemetry_partitions.start()
+    await rollup_partitions.start()
+    drone_registry.load()
+    corridor_cache.load()
+    zone_index.load()
+    violation_tracker.load()
+    last_known.load()
     
-    mqtt_client.connect()
-    mqtt_client.start()
+    # Forward live messages from other processes to our WebSocket clients
+    await fanout_bus.start(telemetry_ws.deliver)
+    
+    # With sharded ingest workers (app.ingest) the API does not consume MQTT
+    if settings.INGEST_IN_API:
+        mqtt_client.connect()
+        await mqtt_client.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Stop MQTT client on shutdown."""
-    mqtt_client.stop()
+    if settings.INGEST_IN_API:
+        await mqtt_client.stop()
+    await fanout_bus.stop()
+    await telemetry_partitions.stop()
+    await rollup_partitions.stop()
 
 @app.get("/", tags=["Health"])
 async def health_check():
@@ -3,6 +3,7 @@ from app.models.drone import Drone
 from app.models.no_fly_zone import NoFlyZone
 from app.models.flight_request import FlightRequest, FlightStatus
 from app.models.telemetry import DroneTelemetry
+from app.models.telemetry_rollup import TelemetryRollup
 from app.models.violation import Violation, ViolationType
 
 # For convenience, expose all models that should be available for import
@@ -13,6 +14,7 @@ __all__ = [
     "FlightRequest",
     "FlightStatus",
     "DroneTelemetry",
+    "TelemetryRollup",
     "Violation",
     "ViolationType",
 ]
\ No newline at end of file
@@ -1,5 +1,5 @@
 from uuid import uuid4
-from sqlalchemy import Column, String, ForeignKey, DateTime, Float, Enum
+from sqlalchemy import Column, String, ForeignKey, DateTime, Float, Enum, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -23,6 +23,10 @@ class FlightRequest(Base):
     """Flight request model with path geometry."""
     
     __tablename__ = "flight_requests"
+    __table_args__ = (
+        # Flights of a drone by status and schedule
+        Index("ix_flight_requests_drone_id_status_start_time", "drone_id", "status", "start_time"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     drone_id = Column(UUID(as_uuid=True), ForeignKey("drones.id"), nullable=False)
@@ -31,6 +35,8 @@ class FlightRequest(Base):
     altitude = Column(Float, nullable=False)
     # LINESTRING geometry for the flight path
     path = Column(Geometry("LINESTRING", srid=4326), nullable=False)
+    # Corridor polygon around the path, computed once at creation/approval
+    corridor = Column(Geometry("POLYGON", srid=4326, spatial_index=True), nullable=True)
     status = Column(
         Enum(FlightStatus), 
         default=FlightStatus.PENDING, 
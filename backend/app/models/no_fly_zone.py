@@ -1,5 +1,5 @@
 from uuid import uuid4
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, String, DateTime, Float, Boolean
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from geoalchemy2 import Geometry
@@ -17,5 +17,9 @@ class NoFlyZone(Base):
     description = Column(String, nullable=True)
     # SRID 4326 is the WGS84 coordinate system used by GPS
     area = Column(Geometry("POLYGON", srid=4326), nullable=False)
+    # Altitude band in meters, open-ended when NULL
+    min_altitude = Column(Float, nullable=True)
+    max_altitude = Column(Float, nullable=True)
+    active = Column(Boolean, default=True, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now()) 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Float, String
+from sqlalchemy import BigInteger, Column, ForeignKey, DateTime, Float, Index, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -8,11 +8,23 @@ from app.db.session import Base
 
 
 class DroneTelemetry(Base):
-    """Drone telemetry model for position tracking."""
+    """Drone telemetry model for position tracking.
+
+    The table is range-partitioned on ``timestamp``; partitions are created
+    and dropped by ``app.db.partitions``. The partition key has to be part
+    of the primary key.
+    """
     
     __tablename__ = "drone_telemetry"
+    __table_args__ = (
+        # Compact index for time range scans, one per partition
+        Index("ix_drone_telemetry_timestamp_brin", "timestamp", postgresql_using="brin"),
+        # Latest points of one drone
+        Index("ix_drone_telemetry_drone_id_timestamp", "drone_id", "timestamp"),
+        {"postgresql_partition_by": 'RANGE ("timestamp")'},
+    )
     
-    id = Column(Integer, primary_key=True, autoincrement=True)
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
     drone_id = Column(UUID(as_uuid=True), ForeignKey("drones.id"), nullable=False)
     # Point geometry for drone position
     location = Column(Geometry("POINT", srid=4326), nullable=False)
@@ -21,7 +33,7 @@ class DroneTelemetry(Base):
     heading = Column(Float, nullable=True)  # in degrees
     battery_level = Column(Float, nullable=True)  # percentage
     status = Column(String, nullable=True)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    timestamp = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
     
     # Relationships
-    drone = relationship("Drone", back_populates="telemetry") 
\ No newline at end of file
+    drone = relationship("Drone", back_populates="telemetry") 
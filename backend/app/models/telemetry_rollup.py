@@ -0,0 +1,39 @@
+from sqlalchemy import Column, ForeignKey, DateTime, Float, Integer
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.session import Base
+
+
+class TelemetryRollup(Base):
+    """Telemetry of a drone aggregated over a time bucket.
+
+    One row per drone, resolution (bucket length in seconds) and bucket
+    start, updated as telemetry is stored (``app.db.rollups``). Positions are
+    kept as plain coordinates with running sums so that rows can be merged
+    incrementally; the centroid is ``sum / point_count``. The table is
+    range-partitioned on ``bucket`` like drone_telemetry.
+    """
+    
+    __tablename__ = "telemetry_rollups"
+    __table_args__ = {"postgresql_partition_by": "RANGE (bucket)"}
+    
+    # Deleted by the database with their drone, Drone has no relationship to them
+    drone_id = Column(UUID(as_uuid=True), ForeignKey("drones.id", ondelete="CASCADE"), primary_key=True)
+    resolution = Column(Integer, primary_key=True)  # seconds
+    bucket = Column(DateTime(timezone=True), primary_key=True)
+    point_count = Column(Integer, nullable=False)
+    first_time = Column(DateTime(timezone=True), nullable=False)
+    first_longitude = Column(Float, nullable=False)
+    first_latitude = Column(Float, nullable=False)
+    last_time = Column(DateTime(timezone=True), nullable=False)
+    last_longitude = Column(Float, nullable=False)
+    last_latitude = Column(Float, nullable=False)
+    sum_longitude = Column(Float, nullable=False)
+    sum_latitude = Column(Float, nullable=False)
+    sum_altitude = Column(Float, nullable=False)
+    min_altitude = Column(Float, nullable=False)
+    max_altitude = Column(Float, nullable=False)
+    # Speed is optional in telemetry, so it has its own count
+    sum_speed = Column(Float, nullable=False)
+    speed_count = Column(Integer, nullable=False)
+    min_battery = Column(Float, nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, String, Enum
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, String, Enum, Float, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -21,16 +21,30 @@ class Violation(Base):
     """Violation model for tracking drone rule violations."""
     
     __tablename__ = "violations"
+    __table_args__ = (
+        # Violations of a drone, newest first
+        Index("ix_violations_drone_id_created_at", "drone_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     drone_id = Column(UUID(as_uuid=True), ForeignKey("drones.id"), nullable=False)
     flight_request_id = Column(UUID(as_uuid=True), ForeignKey("flight_requests.id"), nullable=True)
+    no_fly_zone_id = Column(
+        UUID(as_uuid=True), ForeignKey("no_fly_zones.id", ondelete="SET NULL"), nullable=True
+    )
     type = Column(Enum(ViolationType), nullable=False)
     # Point geometry for violation location
     location = Column(Geometry("POINT", srid=4326), nullable=False)
     description = Column(String, nullable=True)
+    # A violation is an episode: created_at is when it started, ended_at is
+    # NULL while the drone is still in violation
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    ended_at = Column(DateTime(timezone=True), nullable=True)
+    point_count = Column(Integer, default=1, nullable=False)
+    # Deepest distance into the zone / away from the corridor, in meters
+    max_penetration = Column(Float, nullable=True)
     
     # Relationships
     drone = relationship("Drone", back_populates="violations")
-    flight_request = relationship("FlightRequest") 
\ No newline at end of file
+    flight_request = relationship("FlightRequest")
+    no_fly_zone = relationship("NoFlyZone") 
\ No newline at end of file
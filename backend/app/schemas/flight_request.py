@@ -2,7 +2,7 @@ from typing import Optional, List
 from uuid import UUID
 from datetime import datetime
 from pydantic import BaseModel, Field, validator
-from geojson import LineString
+from geojson import LineString, Polygon
 
 from app.models.flight_request import FlightStatus
 
@@ -31,6 +31,7 @@ class FlightRequestResponse(FlightRequestBase):
     """Flight request response schema."""
     id: UUID
     path: LineString
+    corridor: Optional[Polygon] = None
     status: FlightStatus
     rejection_reason: Optional[str] = None
     created_at: datetime
@@ -0,0 +1,39 @@
+from typing import Optional
+from uuid import UUID
+from datetime import datetime
+from pydantic import BaseModel
+from geojson import Polygon
+
+
+class NoFlyZoneBase(BaseModel):
+    """Base no-fly zone schema."""
+    name: str
+    description: Optional[str] = None
+    min_altitude: Optional[float] = None
+    max_altitude: Optional[float] = None
+    active: bool = True
+
+
+class NoFlyZoneCreate(NoFlyZoneBase):
+    """No-fly zone creation schema."""
+    area: Polygon
+
+
+class NoFlyZoneResponse(NoFlyZoneBase):
+    """No-fly zone response schema."""
+    id: UUID
+    area: Polygon
+    created_at: datetime
+    
+    class Config:
+        orm_mode = True
+
+
+class NoFlyZoneUpdate(BaseModel):
+    """No-fly zone update schema."""
+    name: Optional[str] = None
+    description: Optional[str] = None
+    area: Optional[Polygon] = None
+    min_altitude: Optional[float] = None
+    max_altitude: Optional[float] = None
+    active: Optional[bool] = None
@@ -0,0 +1,48 @@
+from typing import Optional
+from uuid import UUID
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class TelemetryBase(BaseModel):
+    """Base telemetry schema."""
+    drone_id: UUID
+    latitude: float
+    longitude: float
+    altitude: float
+    speed: Optional[float] = None
+    heading: Optional[float] = None
+    battery_level: Optional[float] = None
+    status: Optional[str] = None
+
+
+class TelemetryCreate(TelemetryBase):
+    """Telemetry creation schema."""
+    timestamp: Optional[datetime] = None
+
+
+class TelemetryResponse(TelemetryBase):
+    """Telemetry response schema."""
+    timestamp: datetime
+
+    class Config:
+        orm_mode = True
+
+
+class TelemetryRollupResponse(TelemetryResponse):
+    """Telemetry aggregated over ``resolution`` seconds from ``timestamp``.
+
+    ``longitude``/``latitude`` are the centroid, ``altitude`` and ``speed``
+    averages and ``battery_level`` the minimum of the bucket.
+    """
+    resolution: int
+    point_count: int
+    first_time: datetime
+    first_longitude: float
+    first_latitude: float
+    last_time: datetime
+    last_longitude: float
+    last_latitude: float
+    min_altitude: float
+    max_altitude: float
+    min_battery: Optional[float] = None
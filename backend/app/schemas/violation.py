@@ -0,0 +1,23 @@
+from typing import Optional
+from uuid import UUID
+from datetime import datetime
+from pydantic import BaseModel
+
+from app.models.violation import ViolationType
+
+
+class ViolationResponse(BaseModel):
+    """Violation episode response schema."""
+    id: int
+    drone_id: UUID
+    flight_request_id: Optional[UUID] = None
+    no_fly_zone_id: Optional[UUID] = None
+    type: ViolationType
+    description: Optional[str] = None
+    created_at: datetime
+    ended_at: Optional[datetime] = None
+    point_count: int
+    max_penetration: Optional[float] = None
+    
+    class Config:
+        orm_mode = True
@@ -0,0 +1,155 @@
+"""
+Compact binary position frames for fleet views on /ws/telemetry.
+
+A connection in compact mode receives, every tick, one binary WebSocket
+frame with the positions that changed since its previous frame:
+
+    header  <BBHd   version (1), kind (1 = positions), entry count,
+                    server time in seconds since the Unix epoch
+    entry   <IB     drone handle, field mask, then the fields in the mask
+                    in bit order:
+        bit 0  longitude    int32, 1e-7 degrees
+        bit 1  latitude     int32, 1e-7 degrees
+        bit 2  altitude     int16, decimeters
+        bit 3  speed        uint16, cm/s
+        bit 4  heading      uint16, 0.01 degrees
+        bit 5  battery      uint8, 0.5 percent
+        bit 6  status       uint8, code from app.core.telemetry_frame.STATUS_CODES
+        bit 7  longitude and latitude are int16 deltas from the previous
+               values sent for the drone instead of int32 absolute values
+
+Only fields whose quantized value changed are sent. Handles are small
+integers assigned per connection; new ones are announced in a JSON text
+message ``{"type": "handles", "handles": {"<handle>": "<drone_id>"}}``
+sent right before the first frame that uses them. After a frame was lost
+(see ``CompactEncoder.reset``) all handles are announced again and the
+next frame carries absolute values for every field.
+"""
+
+import struct
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import orjson
+
+from app.core.telemetry_frame import STATUS_CODES
+
+COMPACT_VERSION = 1
+KIND_POSITIONS = 1
+
+HEADER = struct.Struct("<BBHd")
+ENTRY = struct.Struct("<IB")
+
+LONGITUDE, LATITUDE, ALTITUDE, SPEED, HEADING, BATTERY, STATUS, DELTA = (1 << bit for bit in range(8))
+
+# Most entries a frame header can count
+MAX_ENTRIES = 65535
+
+# Struct format of each field, and of a coordinate delta
+_FIELD_FORMATS = ("i", "i", "h", "H", "H", "B", "B")
+_DELTA_FORMAT = "h"
+
+_STATUS_INDEX = {status: code for code, status in enumerate(STATUS_CODES)}
+
+# Quantized telemetry values, None where unknown
+Fields = Tuple[Optional[int], ...]
+
+
+def _quantize(value: Optional[float], scale: float, low: int, high: int) -> Optional[int]:
+    """Scale, round and clamp a value into an integer range."""
+    if value is None:
+        return None
+    return max(low, min(high, round(value * scale)))
+
+
+@lru_cache(maxsize=4096)
+def telemetry_fields(message: str) -> Optional[Fields]:
+    """Quantized fields of an encoded telemetry message.
+
+    Cached because the same encoded message is pushed to every connection.
+    """
+    data = orjson.loads(message).get("data") or {}
+    coordinates = (data.get("location") or {}).get("coordinates")
+    if not coordinates:
+        return None
+
+    heading = data.get("heading")
+    return (
+        _quantize(coordinates[0], 1e7, -1_800_000_000, 1_800_000_000),
+        _quantize(coordinates[1], 1e7, -900_000_000, 900_000_000),
+        _quantize(data.get("altitude"), 10, -32768, 32767),
+        _quantize(data.get("speed"), 100, 0, 65535),
+        None if heading is None else _quantize(heading % 360, 100, 0, 35999),
+        _quantize(data.get("battery_level"), 2, 0, 200),
+        _STATUS_INDEX.get(data.get("status"), 0),
+    )
+
+
+class CompactEncoder:
+    """Per-connection state of the compact protocol: handles and last sent values."""
+
+    def __init__(self):
+        """Initialize the encoder."""
+        self._handles: Dict[str, int] = {}
+        self._sent: Dict[str, List[Optional[int]]] = {}
+        self._announce_all = False
+
+    def reset(self):
+        """Forget what the client has, after a frame to it was dropped."""
+        self._sent.clear()
+        self._announce_all = True
+
+    def encode(self, messages: Sequence[Tuple[str, str]]) -> List[Union[str, bytes]]:
+        """Encode ``(drone_id, telemetry message)`` pairs as the frames to send."""
+        new_handles = {}
+        if self._announce_all:
+            new_handles = {str(handle): drone_id for drone_id, handle in self._handles.items()}
+            self._announce_all = False
+        entries = []
+
+        for drone_id, message in messages:
+            fields = telemetry_fields(message)
+            if fields is None:
+                continue
+
+            handle = self._handles.get(drone_id)
+            if handle is None:
+                handle = self._handles[drone_id] = len(self._handles)
+                new_handles[str(handle)] = drone_id
+
+            previous = self._sent.setdefault(drone_id, [None] * len(fields))
+            changed = [bit for bit, value in enumerate(fields) if value is not None and value != previous[bit]]
+            if not changed:
+                continue
+
+            # Small moves travel as int16 coordinate deltas
+            coordinates = [bit for bit in changed if bit < 2]
+            delta = bool(coordinates) and all(
+                previous[bit] is not None and -32768 <= fields[bit] - previous[bit] <= 32767
+                for bit in coordinates
+            )
+
+            mask = DELTA if delta else 0
+            formats = "<"
+            values = []
+            for bit in changed:
+                mask |= 1 << bit
+                if delta and bit < 2:
+                    formats += _DELTA_FORMAT
+                    values.append(fields[bit] - previous[bit])
+                else:
+                    formats += _FIELD_FORMATS[bit]
+                    values.append(fields[bit])
+                previous[bit] = fields[bit]
+
+            entries.append(ENTRY.pack(handle, mask) + struct.pack(formats, *values))
+
+        frames: List[Union[str, bytes]] = []
+        if new_handles:
+            frames.append(orjson.dumps({"type": "handles", "handles": new_handles}).decode())
+        now = time.time()
+        for start in range(0, len(entries), MAX_ENTRIES):
+            chunk = entries[start:start + MAX_ENTRIES]
+            frames.append(HEADER.pack(COMPACT_VERSION, KIND_POSITIONS, len(chunk), now) + b"".join(chunk))
+        return frames
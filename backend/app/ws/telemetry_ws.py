@@ -1,27 +1,410 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
 from sqlalchemy.orm import Session
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Set, Tuple, Union
+import asyncio
 import json
+import logging
 from datetime import datetime
+from uuid import UUID
 
-from app.db.session import get_db
+import orjson
+
+from app.core.config import settings
+from app.core.drone_registry import drone_registry
+from app.core.fanout import Position, fanout_bus
+from app.core.last_known import last_known
+from app.core.subscriptions import ALL_DRONES, SubscriptionRegistry, user_drones
+from app.core.viewport_index import BBox, ViewportIndex, parse_bbox
+from app.db.session import SessionLocal, get_db
+from app.ws.compact_frame import CompactEncoder
 from app.models.user import User
-from app.models.drone import Drone
 from app.api.auth import get_user_from_token
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
-# Store active connections
-active_connections: Dict[str, List[WebSocket]] = {}
+
+class Connection:
+    """A WebSocket client with its own bounded outbound queue.
+
+    Broadcasts only enqueue already encoded messages, and a writer task per
+    connection sends them, so a slow client never delays the others. When
+    the queue is full the oldest message is dropped: for a live map the
+    newest positions matter more than a complete backlog.
+
+    A connection receives messages either for its fleet topics or, once it
+    has a viewport (``bbox``), for the drones it may see positioned inside
+    the viewport.
+
+    Clients may cap positions at ``max_rate`` updates per drone per second
+    and ``max_messages`` position messages per second overall. Throttled
+    positions are held latest-wins per drone and released every
+    WS_THROTTLE_TICK seconds, least recently sent drones first. Other
+    messages, such as violations, are never throttled.
+
+    In the compact protocol the positions released at each tick are sent
+    as one delta-encoded binary frame (see ``app.ws.compact_frame``)
+    instead of one JSON message per position.
+    """
+
+    def __init__(self, websocket: WebSocket, queue_size: int):
+        """Initialize the connection on the event loop that serves it."""
+        self.websocket = websocket
+        self.is_admin = False
+        self.user_id: Optional[str] = None
+        self.bbox: Optional[BBox] = None
+        # Fleet topics set aside while the connection has a viewport
+        self.fleet_topics: Set[Any] = set()
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped_messages = 0
+        self._writer: Optional[asyncio.Task] = None
+
+        # Throttling of position messages
+        self.max_rate: Optional[float] = None
+        self.max_messages: Optional[float] = None
+        self.coalesced_messages = 0
+        self._held: Dict[str, str] = {}
+        self._last_sent: Dict[str, float] = {}
+        self._tokens = 0.0
+        self._throttler: Optional[asyncio.Task] = None
+        self.compact: Optional[CompactEncoder] = None
+        # Times the compact state was dropped for a full queue
+        self._compact_resets = 0
+
+    def allows(self, owner: Optional[str]) -> bool:
+        """Whether the user behind this connection may see a drone of ``owner``."""
+        return self.is_admin or (owner is not None and owner == self.user_id)
+
+    def start(self):
+        """Start the writer task."""
+        self._writer = self.loop.create_task(self._write())
+
+    def stop(self):
+        """Stop the writer and throttle tasks."""
+        if self._writer is not None:
+            self._writer.cancel()
+        if self._throttler is not None:
+            self._throttler.cancel()
+
+    def set_throttle(self, max_rate: Optional[float], max_messages: Optional[float]):
+        """Set or clear the position rate limits (connection loop)."""
+        max_rate = None if max_rate is None else float(max_rate)
+        max_messages = None if max_messages is None else float(max_messages)
+        for value in (max_rate, max_messages):
+            if value is not None and value <= 0:
+                raise ValueError("rate limits must be positive")
+
+        self.max_rate = max_rate
+        self.max_messages = max_messages
+        self._tokens = max_messages or 0.0
+        self._update_throttler()
+
+    def set_protocol(self, protocol: str):
+        """Switch between the "json" and "compact" protocols (connection loop)."""
+        if protocol not in ("json", "compact"):
+            raise ValueError('protocol must be "json" or "compact"')
+
+        # Positions held for the old protocol go out in it
+        self._release(list(self._held.items()))
+        self._held.clear()
+        self.compact = CompactEncoder() if protocol == "compact" else None
+        self._update_throttler()
+
+    def _update_throttler(self):
+        """Run the tick task while positions are throttled or compact."""
+        if self.max_rate is not None or self.max_messages is not None or self.compact is not None:
+            if self._throttler is None:
+                self._throttler = self.loop.create_task(self._throttle())
+            return
+
+        if self._throttler is not None:
+            self._throttler.cancel()
+            self._throttler = None
+        # Release whatever was held back
+        self._release(list(self._held.items()))
+        self._held.clear()
+        self._last_sent.clear()
+
+    def push(self, message: str, drone_id: Optional[str] = None):
+        """Queue an encoded message, from any thread.
+
+        ``drone_id`` marks position messages of that drone, which throttled
+        connections coalesce.
+        """
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self._accept(message, drone_id)
+        else:
+            self.loop.call_soon_threadsafe(self._accept, message, drone_id)
+
+    def _accept(self, message: str, drone_id: Optional[str]):
+        """Queue a message or hold it for the throttle (connection loop)."""
+        if drone_id is None or self._throttler is None:
+            self._enqueue(message)
+            return
+
+        if drone_id in self._held:
+            self.coalesced_messages += 1
+        self._held[drone_id] = message
+
+    async def _throttle(self):
+        """Release held positions within the rate limits until cancelled."""
+        tick = settings.WS_THROTTLE_TICK
+        while True:
+            await asyncio.sleep(tick)
+            now = self.loop.time()
+            interval = 1 / self.max_rate if self.max_rate else 0.0
+            if self.max_messages:
+                self._tokens = min(self.max_messages, self._tokens + self.max_messages * tick)
+
+            released = []
+            for drone_id in sorted(self._held, key=lambda d: self._last_sent.get(d, float("-inf"))):
+                if now - self._last_sent.get(drone_id, float("-inf")) < interval:
+                    continue
+                if self.max_messages:
+                    if self._tokens < 1:
+                        break
+                    self._tokens -= 1
+                released.append((drone_id, self._held.pop(drone_id)))
+                self._last_sent[drone_id] = now
+
+            self._release(released)
+
+            # Only drones still within their interval need remembering
+            self._last_sent = {
+                drone_id: sent for drone_id, sent in self._last_sent.items() if now - sent < interval
+            }
+
+    def _release(self, positions: List[Tuple[str, str]]):
+        """Queue released ``(drone_id, message)`` positions in the connection's protocol."""
+        if self.compact is None:
+            for _, message in positions:
+                self._enqueue(message)
+            return
+
+        resets = self._compact_resets
+        for frame in self.compact.encode(positions) if positions else []:
+            if self._compact_resets != resets and isinstance(frame, bytes):
+                # Encoded against state the client no longer gets
+                self.dropped_messages += 1
+                continue
+            self._enqueue(frame)
+
+    def send_snapshot(self, positions: List[Tuple[str, str]]):
+        """Queue the last known ``(drone_id, message)`` positions of drones (connection loop).
+
+        JSON clients get them as one ``{"type": "snapshot", "messages": [...]}``
+        message, compact clients as a ``{"type": "snapshot"}`` marker followed
+        by frames with absolute values for every drone.
+        """
+        if self.compact is not None:
+            self._enqueue(encode_message({"type": "snapshot"}))
+            self.compact.reset()
+            self._release(positions)
+            return
+        self._enqueue('{"type":"snapshot","messages":[' + ",".join(message for _, message in positions) + "]}")
+
+    def _enqueue(self, message: Union[str, bytes]):
+        """Queue a message, dropping the oldest one when full (connection loop).
+
+        Compact connections drop all their queued frames and handle
+        announcements instead: frames behind a lost one carry deltas and
+        handles relative to it, so the encoder starts over with absolute
+        values and announces every handle again.
+        """
+        if self.queue.full():
+            if self.compact is not None:
+                self._drop_compact_frames()
+                if isinstance(message, bytes):
+                    self.dropped_messages += 1
+                    return
+            if self.queue.full():
+                self.queue.get_nowait()
+                self.dropped_messages += 1
+        self.queue.put_nowait(message)
+
+    def _drop_compact_frames(self):
+        """Drop the queued compact frames and reset the encoder (connection loop)."""
+        kept = []
+        while not self.queue.empty():
+            message = self.queue.get_nowait()
+            if isinstance(message, bytes) or message.startswith('{"type":"handles"'):
+                self.dropped_messages += 1
+            else:
+                kept.append(message)
+        for message in kept:
+            self.queue.put_nowait(message)
+        self.compact.reset()
+        self._compact_resets += 1
+
+    async def _write(self):
+        """Send queued messages until cancelled or the client goes away."""
+        try:
+            while True:
+                message = await self.queue.get()
+                if isinstance(message, bytes):
+                    await self.websocket.send_bytes(message)
+                else:
+                    await self.websocket.send_text(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # The receive loop notices the disconnect and unregisters us
+            logger.info(f"WebSocket send failed: {e}")
+
+
+# Connections without a viewport, by fleet topic
+subscriptions = SubscriptionRegistry()
+
+# Connections with a viewport
+viewport_index = ViewportIndex(
+    cell_size=settings.WS_VIEWPORT_CELL_SIZE,
+    max_cells=settings.WS_VIEWPORT_MAX_CELLS,
+)
+
+# Drones whose owner is being looked up, or was missing, with the time of the lookup
+_owner_lookups: Dict[str, float] = {}
+
+
+def encode_message(message: Dict[str, Any]) -> str:
+    """Serialize an outbound message once for all its recipients."""
+    return orjson.dumps(message).decode()
+
+
+def drone_owner(drone_id: str) -> Optional[str]:
+    """Get the user ID of a drone's owner from the drone registry.
+
+    Drones missing from the registry, such as ones just registered through
+    another process, are looked up in the background so that their next
+    messages can be routed.
+    """
+    try:
+        info = drone_registry.peek(UUID(drone_id))
+    except ValueError:
+        return None
+    if info is not None:
+        if _owner_lookups:
+            _owner_lookups.pop(drone_id, None)
+        return str(info.user_id)
+
+    loop = asyncio.get_running_loop()
+    now = loop.time()
+    if now - _owner_lookups.get(drone_id, float("-inf")) >= settings.DRONE_REGISTRY_NEGATIVE_TTL:
+        _owner_lookups[drone_id] = now
+        loop.run_in_executor(None, _load_drone, drone_id)
+    return None
+
+
+def _load_drone(drone_id: str):
+    """Load a drone into the drone registry (executor thread)."""
+    db = SessionLocal()
+    try:
+        drone_registry.get(db, UUID(drone_id))
+    except Exception as e:
+        logger.error(f"Error looking up drone {drone_id}: {e}")
+    finally:
+        db.close()
+
+
+def default_topic(connection: Connection):
+    """Fleet topic of everything the user behind a connection may see."""
+    return ALL_DRONES if connection.is_admin else user_drones(connection.user_id)
+
+
+def set_viewport(connection: Connection, bbox: Optional[BBox]):
+    """Switch a connection between fleet and viewport routing, or move its viewport.
+
+    Fleet topics are kept aside while the connection has a viewport, and
+    restored when it goes back to fleet routing.
+    """
+    if bbox is None:
+        if connection.bbox is not None:
+            viewport_index.remove(connection)
+            connection.bbox = None
+            for topic in connection.fleet_topics or {default_topic(connection)}:
+                subscriptions.subscribe(connection, topic)
+            connection.fleet_topics = set()
+        return
+
+    if connection.bbox is None:
+        connection.fleet_topics = subscriptions.unsubscribe_all(connection)
+    connection.bbox = bbox
+    viewport_index.set(connection, bbox)
+
+
+def send_snapshot(connection: Connection):
+    """Send a connection the last known position of every drone it receives."""
+    entries = last_known.recent()
+    if connection.bbox is not None:
+        min_lon, min_lat, max_lon, max_lat = connection.bbox
+        positions = [
+            (entry.drone_id, entry.message) for entry in entries
+            if min_lon <= entry.position[0] <= max_lon and min_lat <= entry.position[1] <= max_lat
+            and connection.allows(drone_owner(entry.drone_id))
+        ]
+    else:
+        topics = subscriptions.topics(connection)
+        positions = [
+            (entry.drone_id, entry.message) for entry in entries
+            if ALL_DRONES in topics or user_drones(drone_owner(entry.drone_id)) in topics
+        ]
+    connection.send_snapshot(positions)
+
+
+def fleet_topic(connection: Connection, user_id: Optional[str]):
+    """Fleet topic a connection asked for, if its user may see it.
+
+    Raises ``ValueError`` when the user may not.
+    """
+    if user_id is None:
+        if not connection.is_admin:
+            raise ValueError("Only admins can subscribe to all drones")
+        return ALL_DRONES
+    if not connection.is_admin and user_id != connection.user_id:
+        raise ValueError("Not enough permissions")
+    return user_drones(user_id)
 
 
 @router.websocket("/ws/telemetry")
 async def telemetry_websocket(
     websocket: WebSocket,
     token: str = None,
+    bbox: str = None,
+    max_rate: float = None,
+    max_messages: float = None,
+    protocol: str = "json",
     db: Session = Depends(get_db),
 ):
-    """WebSocket endpoint for real-time telemetry updates."""
+    """WebSocket endpoint for real-time telemetry updates.
+
+    Without a viewport the client receives all the drones it may see, as
+    fleet topics: every drone for admins, the user's own drones otherwise.
+    ``{"command": "subscribe_fleet", "user_id": ...}`` and
+    ``unsubscribe_fleet`` add and remove the drones of one user (or all
+    drones without ``user_id``, admins only). Drones registered after the
+    client connected are included. With
+    ``bbox=min_lon,min_lat,max_lon,max_lat`` in the URL, or after a
+    ``{"command": "subscribe_bbox", "bbox": [...]}`` message, it only
+    receives positions inside that box; ``{"command": "unsubscribe_bbox"}``
+    goes back to all drones. Violations are sent regardless of the viewport.
+
+    On connect and after each of these commands the client first gets a
+    snapshot with the last known position of every drone it now receives.
+
+    ``max_rate`` (position updates per drone per second) and ``max_messages``
+    (position messages per second overall), in the URL or with
+    ``{"command": "set_rate", "max_rate": 1, "max_messages": 50}``, limit
+    the stream to the latest position of each drone within those rates.
+
+    ``protocol=compact`` (or ``{"command": "set_protocol", "protocol":
+    "compact"}``) switches positions to batched delta-encoded binary frames
+    for fleet views; other messages stay JSON text.
+    """
     # Authenticate the user
     user = None
     if token:
@@ -31,25 +414,32 @@ async def telemetry_websocket(
         await websocket.close(code=1008)  # Policy Violation
         return
     
-    await websocket.accept()
-    
-    # Register to receive telemetry updates for all drones the user has access to
-    drones = []
-    if user.is_admin:
-        # Admins can see all drones
-        drones = db.query(Drone).all()
-    else:
-        # Regular users can only see their drones
-        drones = db.query(Drone).filter(Drone.user_id == user.id).all()
+    initial_bbox = None
+    if bbox:
+        try:
+            initial_bbox = parse_bbox(bbox)
+        except ValueError:
+            await websocket.close(code=1008)
+            return
     
-    # Create list of drone IDs
-    drone_ids = [str(drone.id) for drone in drones]
+    await websocket.accept()
+    connection = Connection(websocket, settings.WS_SEND_QUEUE_SIZE)
+    connection.is_admin = user.is_admin
+    connection.user_id = str(user.id)
+    try:
+        connection.set_throttle(max_rate, max_messages)
+        connection.set_protocol(protocol)
+    except ValueError:
+        # set_throttle may already have started the throttle task
+        connection.stop()
+        await websocket.close(code=1008)
+        return
+    connection.start()
     
-    # Add connection to active connections for each drone
-    for drone_id in drone_ids:
-        if drone_id not in active_connections:
-            active_connections[drone_id] = []
-        active_connections[drone_id].append(websocket)
+    subscriptions.subscribe(connection, default_topic(connection))
+    if initial_bbox is not None:
+        set_viewport(connection, initial_bbox)
+    send_snapshot(connection)
     
     try:
         # Keep the connection alive
@@ -64,62 +454,134 @@ async def telemetry_websocket(
                     command = command_data.get("command")
                     
                     if command == "ping":
-                        await websocket.send_json({"type": "pong", "timestamp": datetime.utcnow().isoformat()})
+                        connection.push(encode_message({"type": "pong", "timestamp": datetime.utcnow().isoformat()}))
+                    elif command == "subscribe_bbox":
+                        try:
+                            set_viewport(connection, parse_bbox(command_data.get("bbox")))
+                        except ValueError as e:
+                            connection.push(encode_message({"type": "error", "message": str(e)}))
+                            continue
+                        connection.push(encode_message({"type": "subscribed", "bbox": list(connection.bbox)}))
+                        send_snapshot(connection)
+                    elif command == "unsubscribe_bbox":
+                        set_viewport(connection, None)
+                        connection.push(encode_message({"type": "subscribed", "bbox": None}))
+                        send_snapshot(connection)
+                    elif command in ("subscribe_fleet", "unsubscribe_fleet"):
+                        try:
+                            topic = fleet_topic(connection, command_data.get("user_id"))
+                        except ValueError as e:
+                            connection.push(encode_message({"type": "error", "message": str(e)}))
+                            continue
+                        # With a viewport, fleet topics only take effect once it is removed
+                        topics = connection.fleet_topics if connection.bbox is not None else None
+                        if command == "subscribe_fleet":
+                            if topics is not None:
+                                topics.add(topic)
+                            else:
+                                subscriptions.subscribe(connection, topic)
+                        elif topics is not None:
+                            topics.discard(topic)
+                        else:
+                            subscriptions.unsubscribe(connection, topic)
+                        connection.push(encode_message({
+                            "type": "fleets",
+                            "fleets": sorted(
+                                "all" if topic == ALL_DRONES else topic[1]
+                                for topic in (topics if topics is not None else subscriptions.topics(connection))
+                            ),
+                        }))
+                        if command == "subscribe_fleet" and topics is None:
+                            send_snapshot(connection)
+                    elif command == "set_rate":
+                        try:
+                            connection.set_throttle(command_data.get("max_rate"), command_data.get("max_messages"))
+                        except (TypeError, ValueError) as e:
+                            connection.push(encode_message({"type": "error", "message": str(e)}))
+                            continue
+                        connection.push(encode_message({
+                            "type": "rate",
+                            "max_rate": connection.max_rate,
+                            "max_messages": connection.max_messages,
+                        }))
+                    elif command == "set_protocol":
+                        try:
+                            connection.set_protocol(command_data.get("protocol"))
+                        except ValueError as e:
+                            connection.push(encode_message({"type": "error", "message": str(e)}))
+                            continue
+                        connection.push(encode_message({
+                            "type": "protocol",
+                            "protocol": "compact" if connection.compact is not None else "json",
+                        }))
                 except Exception:
                     pass
             
     except WebSocketDisconnect:
+        pass
+    finally:
         # Remove connection from active connections
-        for drone_id in drone_ids:
-            if drone_id in active_connections:
-                active_connections[drone_id].remove(websocket)
-                if not active_connections[drone_id]:
-                    del active_connections[drone_id]
+        connection.stop()
+        viewport_index.remove(connection)
+        subscriptions.unsubscribe_all(connection)
+
+
+def deliver(drone_id: str, position: Position, encoded: str):
+    """Queue an encoded message for every client of this process watching a drone.
+
+    Positions are recorded as the drone's last known state. Fleet
+    subscribers get the messages of all drones or of the drones of the
+    owner. Messages with a position reach the viewport clients whose
+    viewport contains it, messages without one (violations) all viewport
+    clients allowed to see the drone. Only messages with a position are
+    throttled.
+    """
+    throttle_key = drone_id if position is not None else None
+    if position is not None:
+        last_known.update(drone_id, position, encoded)
+    owner = drone_owner(drone_id) if len(subscriptions) or len(viewport_index) else None
+
+    everyone = subscriptions.subscribers(ALL_DRONES)
+    owners = subscriptions.subscribers(user_drones(owner)) if owner is not None else frozenset()
+    for connection in (everyone | owners if everyone and owners else everyone or owners):
+        connection.push(encoded, throttle_key)
+
+    if not len(viewport_index):
+        return
+
+    candidates = viewport_index if position is None else viewport_index.at(*position)
+    for connection in candidates:
+        if connection.allows(owner):
+            connection.push(encoded, throttle_key)
+
+
+def publish(drone_id: str, message: Dict[str, Any], position: Position = None):
+    """Encode a message once, deliver it locally and forward it to the other processes."""
+    # Positions are always kept for the snapshots of future clients
+    if position is None and not len(subscriptions) and not len(viewport_index) and not fanout_bus.forwarding:
+        return
+
+    encoded = encode_message(message)
+    deliver(drone_id, position, encoded)
+    fanout_bus.publish(drone_id, position, encoded)
 
 
 async def broadcast_telemetry(drone_id: str, telemetry_data: dict):
     """Broadcast telemetry data to all connected clients for a specific drone."""
-    if drone_id in active_connections:
-        disconnected_websockets = []
-        
-        for websocket in active_connections[drone_id]:
-            try:
-                await websocket.send_json({
-                    "type": "telemetry",
-                    "drone_id": drone_id,
-                    "data": telemetry_data,
-                    "timestamp": datetime.utcnow().isoformat()
-                })
-            except Exception:
-                disconnected_websockets.append(websocket)
-        
-        # Clean up disconnected websockets
-        for websocket in disconnected_websockets:
-            active_connections[drone_id].remove(websocket)
-            
-        if not active_connections[drone_id]:
-            del active_connections[drone_id]
+    coordinates = (telemetry_data.get("location") or {}).get("coordinates")
+    publish(drone_id, {
+        "type": "telemetry",
+        "drone_id": drone_id,
+        "data": telemetry_data,
+        "timestamp": datetime.utcnow().isoformat()
+    }, position=(coordinates[0], coordinates[1]) if coordinates else None)
 
 
 async def broadcast_violation(drone_id: str, violation_data: dict):
     """Broadcast violation data to all connected clients for a specific drone."""
-    if drone_id in active_connections:
-        disconnected_websockets = []
-        
-        for websocket in active_connections[drone_id]:
-            try:
-                await websocket.send_json({
-                    "type": "violation",
-                    "drone_id": drone_id,
-                    "data": violation_data,
-                    "timestamp": datetime.utcnow().isoformat()
-                })
-            except Exception:
-                disconnected_websockets.append(websocket)
-        
-        # Clean up disconnected websockets
-        for websocket in disconnected_websockets:
-            active_connections[drone_id].remove(websocket)
-            
-        if not active_connections[drone_id]:
-            del active_connections[drone_id] 
\ No newline at end of file
+    publish(drone_id, {
+        "type": "violation",
+        "drone_id": drone_id,
+        "data": violation_data,
+        "timestamp": datetime.utcnow().isoformat()
+    })
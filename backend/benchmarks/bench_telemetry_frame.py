@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Telemetry payload benchmark - compares bytes on the wire and decode cost of
+JSON telemetry messages and binary telemetry frames, both decoded into
+telemetry rows the way the MQTT client does.
+
+Needs no broker or database. Run it from the backend directory:
+
+    python -m benchmarks.bench_telemetry_frame --messages 100000
+"""
+
+import argparse
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from app.core.mqtt_client import mqtt_client
+from app.core.telemetry_frame import decode_frame, encode_frame
+from app.db.telemetry_writer import TelemetryRow
+
+
+def generate_rows(count: int, drones: int) -> list:
+    """Generate random telemetry rows around Astana."""
+    drone_ids = [uuid.uuid4() for _ in range(drones)]
+    started = datetime.now(timezone.utc)
+    return [
+        TelemetryRow(
+            drone_id=drone_ids[i % drones],
+            longitude=71.4491 + random.uniform(-0.2, 0.2),
+            latitude=51.1694 + random.uniform(-0.2, 0.2),
+            altitude=random.uniform(50, 150),
+            speed=random.uniform(0, 20),
+            heading=random.uniform(0, 360),
+            battery_level=random.uniform(20, 100),
+            status="flying",
+            timestamp=started + timedelta(seconds=i),
+        )
+        for i in range(count)
+    ]
+
+
+def json_payload(row: TelemetryRow) -> bytes:
+    """Encode a row like the simulator's JSON format."""
+    return json.dumps({
+        "drone_id": str(row.drone_id),
+        "timestamp": row.timestamp.isoformat(),
+        "location": {"type": "Point", "coordinates": [row.longitude, row.latitude]},
+        "altitude": row.altitude,
+        "speed": row.speed,
+        "heading": row.heading,
+        "battery_level": row.battery_level,
+        "status": row.status,
+    }).encode()
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Telemetry payload benchmark")
+    parser.add_argument("--messages", type=int, default=100000, help="Number of messages")
+    parser.add_argument("--drones", type=int, default=1000, help="Number of drones")
+    args = parser.parse_args()
+
+    rows = generate_rows(args.messages, args.drones)
+    json_payloads = [json_payload(row) for row in rows]
+    binary_payloads = [encode_frame(*row) for row in rows]
+
+    started = time.perf_counter()
+    for payload in json_payloads:
+        mqtt_client._parse_telemetry(json.loads(payload))
+    json_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for payload in binary_payloads:
+        TelemetryRow._make(decode_frame(payload))
+    binary_elapsed = time.perf_counter() - started
+
+    print(f"{args.messages} messages from {args.drones} drones")
+    for name, payloads, elapsed in (
+        ("json", json_payloads, json_elapsed),
+        ("binary", binary_payloads, binary_elapsed),
+    ):
+        size = sum(len(payload) for payload in payloads) / len(payloads)
+        print(
+            f"{name:>8}: {size:>6.1f} bytes/message, "
+            f"{elapsed / len(payloads) * 1e6:>6.2f} us/message decode"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Telemetry writer benchmark - compares ORM inserts, executemany and COPY
+for the drone_telemetry table on the configured database.
+
+Every run is rolled back, so it can be pointed at a development database
+that already has at least one registered drone. Run it from the backend
+directory:
+
+    python -m benchmarks.bench_telemetry_writer --rows 50000
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from geoalchemy2.shape import from_shape
+from shapely.geometry import Point
+
+from app.db.session import SessionLocal
+from app.db.telemetry_writer import TelemetryRow, TelemetryWriter
+from app.models.drone import Drone
+from app.models.telemetry import DroneTelemetry
+
+
+def generate_rows(drone_ids: List, count: int) -> List[TelemetryRow]:
+    """Generate random telemetry rows around Astana."""
+    now = datetime.now(timezone.utc)
+    return [
+        TelemetryRow(
+            drone_id=random.choice(drone_ids),
+            longitude=71.4491 + random.uniform(-0.05, 0.05),
+            latitude=51.1694 + random.uniform(-0.05, 0.05),
+            altitude=random.uniform(50, 150),
+            speed=random.uniform(0, 20),
+            heading=random.uniform(0, 360),
+            battery_level=random.uniform(20, 100),
+            status="flying",
+            timestamp=now + timedelta(milliseconds=i),
+        )
+        for i in range(count)
+    ]
+
+
+def write_orm(db, rows: List[TelemetryRow]):
+    """Insert rows one ORM object at a time (the previous ingest path)."""
+    for row in rows:
+        db.add(DroneTelemetry(
+            drone_id=row.drone_id,
+            location=from_shape(Point(row.longitude, row.latitude), srid=4326),
+            altitude=row.altitude,
+            speed=row.speed,
+            heading=row.heading,
+            battery_level=row.battery_level,
+            status=row.status,
+            timestamp=row.timestamp,
+        ))
+    db.flush()
+
+
+def run(name: str, rows: List[TelemetryRow], write):
+    """Time one write method inside a rolled back transaction."""
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        write(db, rows)
+        elapsed = time.perf_counter() - started
+        print(f"{name:>12}: {len(rows):>8} rows in {elapsed:7.3f}s ({len(rows) / elapsed:>10.0f} rows/s)")
+    finally:
+        db.rollback()
+        db.close()
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Telemetry writer benchmark")
+    parser.add_argument("--rows", type=int, default=10000, help="Rows per method")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        drone_ids = [row[0] for row in db.query(Drone.id).limit(100).all()]
+    finally:
+        db.close()
+
+    if not drone_ids:
+        print("No drones registered, register at least one drone first")
+        return
+
+    rows = generate_rows(drone_ids, args.rows)
+
+    run("orm", rows, write_orm)
+    run("executemany", rows, TelemetryWriter(use_copy=False).write)
+    run("copy", rows, TelemetryWriter().write)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Zone index benchmark - compares per-point lookups with batched vectorized
+classification on synthetic no-fly zones around Astana and Almaty.
+
+Needs no database. Run it from the backend directory:
+
+    python -m benchmarks.bench_zone_index --zones 300 --points 100000
+"""
+
+import argparse
+import time
+import uuid
+
+import numpy as np
+import shapely
+
+from app.core.zone_index import ZoneEntry, ZoneIndex
+
+CITIES = [
+    (71.4491, 51.1694),  # Astana
+    (76.9286, 43.2567),  # Almaty
+]
+
+
+def generate_zones(count: int, rng: np.random.Generator) -> list:
+    """Generate random circular zones with random altitude bands."""
+    zones = []
+    for i in range(count):
+        lon, lat = CITIES[i % len(CITIES)]
+        center = shapely.Point(lon + rng.uniform(-0.2, 0.2), lat + rng.uniform(-0.2, 0.2))
+        area = center.buffer(rng.uniform(0.002, 0.02), quad_segs=16)
+        shapely.prepare(area)
+        min_altitude = None if rng.random() < 0.5 else float(rng.uniform(0, 100))
+        max_altitude = None if rng.random() < 0.5 else float(rng.uniform(120, 500))
+        zones.append(ZoneEntry(uuid.uuid4(), f"zone-{i}", area, min_altitude, max_altitude))
+    return zones
+
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Zone index benchmark")
+    parser.add_argument("--zones", type=int, default=300, help="Number of zones")
+    parser.add_argument("--points", type=int, default=100000, help="Number of points")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    index = ZoneIndex(refresh_interval=float("inf"))
+    index.set_zones(generate_zones(args.zones, rng))
+
+    city = rng.integers(0, len(CITIES), args.points)
+    centers = np.array(CITIES)[city]
+    longitudes = centers[:, 0] + rng.uniform(-0.25, 0.25, args.points)
+    latitudes = centers[:, 1] + rng.uniform(-0.25, 0.25, args.points)
+    altitudes = rng.uniform(0, 300, args.points)
+
+    started = time.perf_counter()
+    per_point = [
+        index.zones_at(lon, lat, alt)
+        for lon, lat, alt in zip(longitudes.tolist(), latitudes.tolist(), altitudes.tolist())
+    ]
+    per_point_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batched = index.classify(longitudes, latitudes, altitudes)
+    batched_elapsed = time.perf_counter() - started
+
+    hits = sum(len(zones) for zones in batched)
+    assert hits == sum(len(zones) for zones in per_point)
+
+    print(f"{args.zones} zones, {args.points} points, {hits} zone hits")
+    print(f"   per-point: {args.points / per_point_elapsed:>12.0f} points/s")
+    print(f"     batched: {args.points / batched_elapsed:>12.0f} points/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,13 +8,15 @@ import time
 import uuid
 import random
 import argparse
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Dict, List, Tuple
 
 import paho.mqtt.client as mqtt
 from shapely.geometry import LineString, Point
 import numpy as np
 
+from app.core.telemetry_frame import BINARY_TOPIC_SUFFIX, encode_frame
+
 
 class DroneSimulator:
     """Simulates drone movement along a path and sends telemetry via MQTT."""
@@ -25,12 +27,18 @@ class DroneSimulator:
         broker_host: str = "localhost",
         broker_port: int = 1883,
         topic_prefix: str = "drones",
+        payload_format: str = "json",
     ):
         """Initialize the drone simulator."""
         self.drone_id = drone_id
         self.broker_host = broker_host
         self.broker_port = broker_port
+        self.payload_format = payload_format
         self.topic = f"{topic_prefix}/{drone_id}/telemetry"
+        if payload_format == "binary":
+            self.topic += BINARY_TOPIC_SUFFIX
+        self.published_messages = 0
+        self.published_bytes = 0
         
         # Connect to MQTT broker
         self.client = mqtt.Client(f"drone-sim-{drone_id}")
@@ -95,31 +103,48 @@ class DroneSimulator:
                 # Simulate battery drain
                 self.battery_level -= 0.01
                 
-                # Create telemetry data
-                telemetry = {
-                    "drone_id": self.drone_id,
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "location": {
-                        "type": "Point",
-                        "coordinates": [current_lon, current_lat]
-                    },
-                    "altitude": self.altitude,
-                    "speed": self.speed,
-                    "heading": random.uniform(0, 360),
-                    "battery_level": self.battery_level,
-                    "status": self.status
-                }
-                
                 # Send telemetry via MQTT
-                self.client.publish(self.topic, json.dumps(telemetry))
-                print(f"Published: {json.dumps(telemetry)}")
+                payload = self.encode_telemetry(current_lon, current_lat, random.uniform(0, 360))
+                self.client.publish(self.topic, payload)
+                self.published_messages += 1
+                self.published_bytes += len(payload)
+                print(f"Published {len(payload)} bytes: {payload if self.payload_format == 'json' else payload.hex()}")
                 
                 # Wait for the next interval
                 time.sleep(interval)
     
+    def encode_telemetry(self, lon: float, lat: float, heading: float):
+        """Encode the current state in the configured payload format."""
+        timestamp = datetime.now(timezone.utc)
+        if self.payload_format == "binary":
+            return encode_frame(
+                uuid.UUID(self.drone_id), lon, lat, self.altitude, self.speed,
+                heading, self.battery_level, self.status, timestamp,
+            )
+        
+        telemetry = {
+            "drone_id": self.drone_id,
+            "timestamp": timestamp.isoformat(),
+            "location": {
+                "type": "Point",
+                "coordinates": [lon, lat]
+            },
+            "altitude": self.altitude,
+            "speed": self.speed,
+            "heading": heading,
+            "battery_level": self.battery_level,
+            "status": self.status
+        }
+        return json.dumps(telemetry)
+    
     def close(self):
         """Disconnect from MQTT broker."""
         self.client.disconnect()
+        if self.published_messages:
+            print(
+                f"Published {self.published_messages} {self.payload_format} messages, "
+                f"{self.published_bytes / self.published_messages:.1f} bytes/message on average"
+            )
 
 
 def main():
@@ -130,6 +155,7 @@ def main():
     parser.add_argument("--broker-port", type=int, default=1883, help="MQTT broker port")
     parser.add_argument("--duration", type=int, default=60, help="Simulation duration in seconds")
     parser.add_argument("--interval", type=float, default=1.0, help="Telemetry interval in seconds")
+    parser.add_argument("--format", choices=["json", "binary"], default="json", help="Telemetry payload format")
     args = parser.parse_args()
     
     # Create drone simulator
@@ -137,6 +163,7 @@ def main():
         drone_id=args.drone_id,
         broker_host=args.broker_host,
         broker_port=args.broker_port,
+        payload_format=args.format,
     )
     
     try: